@@ -1,63 +1,97 @@
 """Authentication routes"""
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_db, get_current_user
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.deps import get_async_db, get_current_user
+from app.core.security import create_access_token
+from app.core.password_hasher import password_hasher
+from app.db.runner import DbRunner
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, TokenResponse, UserResponse
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _find_user(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
+
+def _create_user(db: Session, user_data: UserCreate, hashed_password: str) -> UserResponse:
+    new_user = User(
+        email=user_data.email,
+        hashed_password=hashed_password,
+        full_name=user_data.full_name,
+        role="customer"
+    )
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    return UserResponse.model_validate(new_user)
+
+
+def _update_hash(db: Session, user_id: int, new_hash: str) -> None:
+    db.query(User).filter(User.id == user_id).update(
+        {"hashed_password": new_hash}, synchronize_session=False
+    )
+    db.commit()
+
+
 @router.post("/signup", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+async def signup(user_data: UserCreate, db: DbRunner = Depends(get_async_db)):
     """Register a new user"""
     # Check if user exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.run(_find_user, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
+    # End the read transaction so no pooled connection is held while hashing
+    await db.commit()
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
-    new_user = User(
-        email=user_data.email,
-        hashed_password=hashed_password,
-        full_name=user_data.full_name,
-        role="customer"
-    )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    hashed_password = await password_hasher.hash(user_data.password)
+    user = await db.run(_create_user, user_data, hashed_password)
     
     # Create access token
-    access_token = create_access_token(data={"sub": str(new_user.id)})
+    access_token = create_access_token(data={"sub": str(user.id)})
     
     return TokenResponse(
         access_token=access_token,
-        user=UserResponse.model_validate(new_user)
+        user=user
     )
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: DbRunner = Depends(get_async_db)):
     """Login user"""
-    user = db.query(User).filter(User.email == credentials.email).first()
+    user = await db.run(_find_user, credentials.email)
+    user_response = UserResponse.model_validate(user) if user else None
+    hashed_password = user.hashed_password if user else None
+    # End the read transaction so no pooled connection is held while verifying
+    await db.commit()
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    valid, new_hash = False, None
+    if user_response:
+        valid, new_hash = await password_hasher.verify_and_update(credentials.password, hashed_password)
+    
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
-    access_token = create_access_token(data={"sub": str(user.id)})
+    # Transparently upgrade hashes made with outdated settings
+    if new_hash:
+        await db.run(_update_hash, user_response.id, new_hash)
+    
+    access_token = create_access_token(data={"sub": str(user_response.id)})
     
     return TokenResponse(
         access_token=access_token,
-        user=UserResponse.model_validate(user)
+        user=user_response
     )
 
 
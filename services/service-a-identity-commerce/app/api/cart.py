@@ -1,44 +1,47 @@
 """Cart management routes"""
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
-from app.core.deps import get_db, get_current_user
+from app.core.deps import get_async_db, get_current_user
+from app.db.runner import DbRunner
 from app.models.user import User
 from app.models.cart import Cart, CartItem
+from app.schemas.catalog import CatalogVariant
 from app.schemas.cart import CartItemCreate, CartItemUpdate, CartResponse
+from app.services.catalog_client import CatalogUnavailableError, catalog_client
 
 router = APIRouter(prefix="/cart", tags=["cart"])
 
 
-@router.get("", response_model=CartResponse)
-def get_cart(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get current user's cart"""
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+def load_cart(db: Session, user_id: int) -> Cart:
+    """Get the user's cart with its items, or None"""
+    return db.query(Cart).options(selectinload(Cart.items)).filter(Cart.user_id == user_id).first()
+
+
+def cart_response(db: Session, cart: Cart) -> CartResponse:
+    """Reload the cart after a write and serialize it while the session is active"""
+    db.refresh(cart)
+    return CartResponse.model_validate(cart)
+
+
+def _get_cart(db: Session, user_id: int) -> CartResponse:
+    cart = load_cart(db, user_id)
     
     if not cart:
         # Create new cart if doesn't exist
-        cart = Cart(user_id=current_user.id)
+        cart = Cart(user_id=user_id)
         db.add(cart)
         db.commit()
-        db.refresh(cart)
+        return cart_response(db, cart)
     
-    return cart
+    return CartResponse.model_validate(cart)
 
 
-@router.post("/items", response_model=CartResponse, status_code=status.HTTP_201_CREATED)
-def add_to_cart(
-    item_data: CartItemCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Add item to cart"""
+def _add_to_cart(db: Session, user_id: int, item_data: CartItemCreate, variant: CatalogVariant) -> CartResponse:
     # Get or create cart
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    cart = load_cart(db, user_id)
     if not cart:
-        cart = Cart(user_id=current_user.id)
+        cart = Cart(user_id=user_id)
         db.add(cart)
         db.commit()
         db.refresh(cart)
@@ -54,32 +57,22 @@ def add_to_cart(
         existing_item.quantity += item_data.quantity
         db.commit()
     else:
-        # TODO: Fetch price from Service B
-        # For now, we'll need to pass price from frontend or fetch it
         new_item = CartItem(
             cart_id=cart.id,
-            product_id=item_data.product_id,
-            variant_id=item_data.variant_id,
+            product_id=variant.product_id,
+            variant_id=variant.variant_id,
             sku=item_data.sku,
             quantity=item_data.quantity,
-            price=0.0  # Should be fetched from Service B
+            price=variant.price
         )
         db.add(new_item)
         db.commit()
     
-    db.refresh(cart)
-    return cart
+    return cart_response(db, cart)
 
 
-@router.put("/items/{item_id}", response_model=CartResponse)
-def update_cart_item(
-    item_id: int,
-    item_data: CartItemUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Update cart item quantity"""
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+def _update_cart_item(db: Session, user_id: int, item_id: int, item_data: CartItemUpdate) -> CartResponse:
+    cart = load_cart(db, user_id)
     if not cart:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart not found")
     
@@ -97,18 +90,11 @@ def update_cart_item(
         item.quantity = item_data.quantity
     
     db.commit()
-    db.refresh(cart)
-    return cart
+    return cart_response(db, cart)
 
 
-@router.delete("/items/{item_id}", response_model=CartResponse)
-def remove_from_cart(
-    item_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Remove item from cart"""
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+def _remove_from_cart(db: Session, user_id: int, item_id: int) -> CartResponse:
+    cart = load_cart(db, user_id)
     if not cart:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart not found")
     
@@ -122,18 +108,69 @@ def remove_from_cart(
     
     db.delete(item)
     db.commit()
-    db.refresh(cart)
-    return cart
+    return cart_response(db, cart)
+
+
+def _clear_cart(db: Session, user_id: int) -> None:
+    cart = db.query(Cart).filter(Cart.user_id == user_id).first()
+    if cart:
+        db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+        db.commit()
+
+
+@router.get("", response_model=CartResponse)
+async def get_cart(
+    current_user: User = Depends(get_current_user),
+    db: DbRunner = Depends(get_async_db)
+):
+    """Get current user's cart"""
+    return await db.run(_get_cart, current_user.id)
+
+
+@router.post("/items", response_model=CartResponse, status_code=status.HTTP_201_CREATED)
+async def add_to_cart(
+    item_data: CartItemCreate,
+    current_user: User = Depends(get_current_user),
+    db: DbRunner = Depends(get_async_db)
+):
+    """Add item to cart"""
+    # Price snapshot comes from the catalog, never from the client
+    try:
+        variant = await catalog_client.get_variant(item_data.sku)
+    except CatalogUnavailableError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Catalog unavailable")
+    if variant is None or not variant.is_active:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="SKU not found")
+    
+    return await db.run(_add_to_cart, current_user.id, item_data, variant)
+
+
+@router.put("/items/{item_id}", response_model=CartResponse)
+async def update_cart_item(
+    item_id: int,
+    item_data: CartItemUpdate,
+    current_user: User = Depends(get_current_user),
+    db: DbRunner = Depends(get_async_db)
+):
+    """Update cart item quantity"""
+    return await db.run(_update_cart_item, current_user.id, item_id, item_data)
+
+
+@router.delete("/items/{item_id}", response_model=CartResponse)
+async def remove_from_cart(
+    item_id: int,
+    current_user: User = Depends(get_current_user),
+    db: DbRunner = Depends(get_async_db)
+):
+    """Remove item from cart"""
+    return await db.run(_remove_from_cart, current_user.id, item_id)
 
 
 @router.delete("", status_code=status.HTTP_204_NO_CONTENT)
-def clear_cart(
+async def clear_cart(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: DbRunner = Depends(get_async_db)
 ):
     """Clear all items from cart"""
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
-    if cart:
-        db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
-        db.commit()
+    await db.run(_clear_cart, current_user.id)
     return None
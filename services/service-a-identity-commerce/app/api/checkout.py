@@ -1,62 +1,82 @@
 """Checkout and payment routes"""
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
-import httpx
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.orm import Session, selectinload
 import json
 from datetime import datetime
+from typing import Dict, Optional, Tuple
 
-from app.core.deps import get_db, get_current_user
-from app.core.config import settings
+from app.core.deps import get_async_db, get_current_user
+from app.db.runner import DbRunner
 from app.models.user import User
 from app.models.cart import Cart, CartItem
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.payment import Payment, PaymentStatus
 from app.models.address import Address
 from app.schemas.order import CheckoutRequest, PaymentIntentResponse, PaymentConfirmRequest, OrderResponse
-from app.services.stripe_service import create_payment_intent, retrieve_payment_intent
+from app.services.payment_gateway import PaymentGatewayError, PaymentGatewayUnavailable, payment_gateway
+from app.services.outbox import enqueue_event
+from app.services.idempotency import (
+    IdempotencyKeyInUse,
+    IdempotencyKeyMismatch,
+    claim_key,
+    complete_key,
+    release_key,
+    replay_response,
+    request_fingerprint
+)
+from app.services.order_numbers import next_order_number
+from app.schemas.catalog import CatalogVariant
+from app.services.catalog_client import CatalogUnavailableError, catalog_client
 
 router = APIRouter(prefix="/checkout", tags=["checkout"])
 
 
-async def notify_service(event_type: str, data: dict):
-    """Send notification to Service C"""
-    try:
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                settings.NOTIFICATIONS_URL,
-                json={"type": event_type, "data": data},
-                timeout=5.0
-            )
-    except Exception as e:
-        print(f"Failed to send notification: {e}")
+def address_snapshot(address: Address) -> str:
+    return json.dumps({
+        "street": address.street,
+        "city": address.city,
+        "state": address.state,
+        "postal_code": address.postal_code,
+        "country": address.country
+    })
 
 
-@router.post("/create-payment-intent", response_model=PaymentIntentResponse)
-async def create_checkout_payment_intent(
-    checkout_data: CheckoutRequest,
-    background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Create payment intent and order"""
+def _load_checkout(db: Session, user_id: int, checkout_data: CheckoutRequest) -> Tuple[Cart, Address, Address]:
+    """Load the cart (with items) and both addresses"""
     # Get cart
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    cart = db.query(Cart).options(selectinload(Cart.items)).filter(Cart.user_id == user_id).first()
     if not cart or not cart.items:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cart is empty")
     
     # Get addresses
     shipping_address = db.query(Address).filter(
         Address.id == checkout_data.shipping_address_id,
-        Address.user_id == current_user.id
+        Address.user_id == user_id
     ).first()
     billing_address = db.query(Address).filter(
         Address.id == checkout_data.billing_address_id,
-        Address.user_id == current_user.id
+        Address.user_id == user_id
     ).first()
     
     if not shipping_address or not billing_address:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Address not found")
     
+    return cart, shipping_address, billing_address
+
+
+def _create_order(
+    db: Session,
+    user_id: int,
+    cart: Cart,
+    shipping_address: Address,
+    billing_address: Address,
+    variants: Dict[str, CatalogVariant]
+) -> Order:
+    """Create the order and its items (flushed, not committed)"""
+    for item in cart.items:
+        if not item.price and item.sku in variants:
+            item.price = variants[item.sku].price
+    
     # Calculate totals
     subtotal = sum(item.price * item.quantity for item in cart.items)
     tax = subtotal * 0.08  # 8% tax
@@ -64,31 +84,16 @@ async def create_checkout_payment_intent(
     total = subtotal + tax + shipping_cost
     
     # Create order
-    import random
-    order_number = f"ORD-{datetime.utcnow().strftime('%Y%m%d')}-{random.randint(1000, 9999)}"
-    
     new_order = Order(
-        user_id=current_user.id,
-        order_number=order_number,
+        user_id=user_id,
+        order_number=next_order_number(),
         status=OrderStatus.CREATED,
         subtotal=subtotal,
         tax=tax,
         shipping_cost=shipping_cost,
         total=total,
-        shipping_address=json.dumps({
-            "street": shipping_address.street,
-            "city": shipping_address.city,
-            "state": shipping_address.state,
-            "postal_code": shipping_address.postal_code,
-            "country": shipping_address.country
-        }),
-        billing_address=json.dumps({
-            "street": billing_address.street,
-            "city": billing_address.city,
-            "state": billing_address.state,
-            "postal_code": billing_address.postal_code,
-            "country": billing_address.country
-        })
+        shipping_address=address_snapshot(shipping_address),
+        billing_address=address_snapshot(billing_address)
     )
     db.add(new_order)
     db.flush()
@@ -100,91 +105,191 @@ async def create_checkout_payment_intent(
             product_id=cart_item.product_id,
             variant_id=cart_item.variant_id,
             sku=cart_item.sku,
-            product_name=f"Product {cart_item.product_id}",  # Should fetch from Service B
+            product_name=(
+                variants[cart_item.sku].product_name if cart_item.sku in variants
+                else f"Product {cart_item.product_id}"
+            ),
             quantity=cart_item.quantity,
             price=cart_item.price
         )
         db.add(order_item)
     
+    return new_order
+
+
+def _record_payment(db: Session, order_id: int, order_number: str, total: float, intent_id: str, user_email: str) -> None:
+    payment = Payment(
+        order_id=order_id,
+        stripe_payment_intent_id=intent_id,
+        amount=total,
+        status=PaymentStatus.PENDING
+    )
+    db.add(payment)
+    
+    # Notification is delivered by the outbox relay once this commits
+    enqueue_event(
+        db,
+        "ORDER_PLACED",
+        {"order_id": order_id, "order_number": order_number, "user_email": user_email}
+    )
+    db.commit()
+
+
+def _cancel_order(db: Session, order_id: int) -> None:
+    """Cancel an order whose payment intent could not be created"""
+    db.query(Order).filter(Order.id == order_id, Order.status == OrderStatus.CREATED).update(
+        {"status": OrderStatus.CANCELLED}, synchronize_session=False
+    )
+    db.commit()
+
+
+def _get_payment(db: Session, payment_intent_id: str) -> Payment:
+    return db.query(Payment).filter(
+        Payment.stripe_payment_intent_id == payment_intent_id
+    ).first()
+
+
+def _mark_paid(db: Session, payment: Payment, user_id: int, user_email: str) -> OrderResponse:
+    payment.status = PaymentStatus.COMPLETED
+    order = db.query(Order).options(selectinload(Order.items)).filter(Order.id == payment.order_id).first()
+    
+    # Conditional, so an order the webhook processor already marked paid is not notified twice
+    paid = db.query(Order).filter(Order.id == order.id, Order.status == OrderStatus.CREATED).update(
+        {"status": OrderStatus.PAID, "paid_at": datetime.utcnow()}, synchronize_session=False
+    )
+    
+    # Clear cart
+    cart = db.query(Cart).filter(Cart.user_id == user_id).first()
+    if cart:
+        db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+    
+    if paid:
+        enqueue_event(
+            db,
+            "ORDER_PAID",
+            {"order_id": order.id, "order_number": order.order_number, "user_email": user_email}
+        )
+    
+    db.commit()
+    db.refresh(order)
+    
+    return OrderResponse.model_validate(order)
+
+
+async def _place_order(
+    db: DbRunner,
+    current_user: User,
+    checkout_data: CheckoutRequest,
+    idempotency_key: Optional[str]
+) -> PaymentIntentResponse:
+    """Create the order and its Stripe payment intent"""
+    cart, shipping_address, billing_address = await db.run(_load_checkout, current_user.id, checkout_data)
+    
+    # Resolve names (and prices for legacy zero-priced lines) in one catalog call
+    try:
+        variants = await catalog_client.get_variants(item.sku for item in cart.items)
+    except CatalogUnavailableError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Catalog unavailable")
+    
+    new_order = await db.run(_create_order, current_user.id, cart, shipping_address, billing_address, variants)
+    order_id, order_number, total = new_order.id, new_order.order_number, new_order.total
+    # Commit before calling Stripe so no pooled connection is held for the round trip
+    await db.commit()
+    
     # Create Stripe payment intent
     try:
-        intent = create_payment_intent(
+        intent = await payment_gateway.create_payment_intent(
             amount=total,
-            metadata={"order_id": new_order.id, "order_number": order_number}
+            metadata={"order_id": order_id, "order_number": order_number},
+            idempotency_key=f"payment-intent-{order_number}"
         )
-        
-        # Create payment record
-        payment = Payment(
-            order_id=new_order.id,
-            stripe_payment_intent_id=intent.id,
-            amount=total,
-            status=PaymentStatus.PENDING
-        )
-        db.add(payment)
-        db.commit()
-        
-        # Send notification
-        background_tasks.add_task(
-            notify_service,
-            "ORDER_PLACED",
-            {"order_id": new_order.id, "order_number": order_number, "user_email": current_user.email}
+    except PaymentGatewayError as e:
+        await db.run(_cancel_order, order_id)
+        code = (
+            status.HTTP_503_SERVICE_UNAVAILABLE if isinstance(e, PaymentGatewayUnavailable)
+            else status.HTTP_502_BAD_GATEWAY
         )
-        
-        return PaymentIntentResponse(
+        raise HTTPException(status_code=code, detail=str(e))
+    
+    try:
+        response = PaymentIntentResponse(
             client_secret=intent.client_secret,
-            order_id=new_order.id
+            order_id=order_id
         )
+        if idempotency_key:
+            # Stored in the transaction _record_payment commits
+            await db.run(complete_key, current_user.id, idempotency_key, status.HTTP_200_OK, response.model_dump_json())
+        await db.run(_record_payment, order_id, order_number, total, intent.id, current_user.email)
+        
+        return response
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        await db.run(_cancel_order, order_id)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.post("/create-payment-intent", response_model=PaymentIntentResponse)
+async def create_checkout_payment_intent(
+    checkout_data: CheckoutRequest,
+    current_user: User = Depends(get_current_user),
+    db: DbRunner = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+):
+    """Create payment intent and order (retries with the same Idempotency-Key replay the first response)"""
+    if idempotency_key:
+        try:
+            completed = await db.run(
+                claim_key, current_user.id, idempotency_key, request_fingerprint(checkout_data.model_dump())
+            )
+        except IdempotencyKeyInUse:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is already in progress"
+            )
+        except IdempotencyKeyMismatch:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request"
+            )
+        if completed is not None:
+            return replay_response(completed)
+    
+    try:
+        return await _place_order(db, current_user, checkout_data, idempotency_key)
+    except Exception:
+        if idempotency_key:
+            await db.rollback()
+            await db.run(release_key, current_user.id, idempotency_key)
+        raise
+
+
 @router.post("/confirm", response_model=OrderResponse)
 async def confirm_payment(
     confirm_data: PaymentConfirmRequest,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: DbRunner = Depends(get_async_db)
 ):
     """Confirm payment and finalize order"""
     # Get payment
-    payment = db.query(Payment).filter(
-        Payment.stripe_payment_intent_id == confirm_data.payment_intent_id
-    ).first()
+    payment = await db.run(_get_payment, confirm_data.payment_intent_id)
     
     if not payment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payment not found")
+    # End the read transaction so no pooled connection is held during the Stripe call
+    await db.commit()
     
     # Verify payment with Stripe
     try:
-        intent = retrieve_payment_intent(confirm_data.payment_intent_id)
-        
-        if intent.status == "succeeded":
-            payment.status = PaymentStatus.COMPLETED
-            order = db.query(Order).filter(Order.id == payment.order_id).first()
-            order.status = OrderStatus.PAID
-            order.paid_at = datetime.utcnow()
-            
-            # Clear cart
-            cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
-            if cart:
-                db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
-            
-            db.commit()
-            db.refresh(order)
-            
-            # Send notification
-            background_tasks.add_task(
-                notify_service,
-                "ORDER_PAID",
-                {"order_id": order.id, "order_number": order.order_number, "user_email": current_user.email}
-            )
-            
-            return order
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Payment not successful: {intent.status}"
-            )
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        intent = await payment_gateway.retrieve_payment_intent(confirm_data.payment_intent_id)
+    except PaymentGatewayUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except PaymentGatewayError as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+    
+    if intent.status != "succeeded":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Payment not successful: {intent.status}"
+        )
+    
+    return await db.run(_mark_paid, payment, current_user.id, current_user.email)
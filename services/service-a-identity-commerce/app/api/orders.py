@@ -1,26 +1,71 @@
 """Orders management routes"""
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, func, or_, select
+from typing import List, Optional
 
-from app.core.deps import get_db, get_current_user, get_current_admin
+from app.core.deps import get_async_db, get_db, get_current_user, get_current_admin
+from app.db.runner import DbRunner
+from app.core.pagination import CREATED_AT_CURSOR, MAX_PAGE_SIZE, decode_cursor, encode_cursor, set_next_cursor
 from app.models.user import User
-from app.models.order import Order, OrderStatus
-from app.schemas.order import OrderResponse, OrderStatusUpdate
-from app.api.checkout import notify_service
+from app.models.order import Order, OrderItem, OrderStatus
+from app.schemas.order import (
+    BulkOrderStatusResponse,
+    BulkOrderStatusUpdate,
+    OrderResponse,
+    OrderStatusUpdate,
+    OrderSummaryResponse
+)
+from app.services.order_status import can_transition, transition_orders
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
-@router.get("", response_model=List[OrderResponse])
+def order_summaries(db: Session):
+    """Summary columns for list views; item counts come from a correlated subquery on the page's rows only"""
+    item_count = select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(
+        OrderItem.order_id == Order.id
+    ).correlate(Order).scalar_subquery()
+    
+    return db.query(
+        Order.id,
+        Order.order_number,
+        Order.status,
+        Order.total,
+        item_count.label("item_count"),
+        Order.created_at
+    )
+
+
+def paginate_orders(query, response: Response, cursor: Optional[str], limit: int) -> List:
+    """Apply newest-first keyset pagination on (created_at, id)"""
+    after = decode_cursor(cursor, CREATED_AT_CURSOR)
+    if after:
+        query = query.filter(or_(
+            Order.created_at < after["created_at"],
+            and_(Order.created_at == after["created_at"], Order.id < after["id"])
+        ))
+    
+    orders = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1).all()
+    
+    if len(orders) > limit:
+        orders = orders[:limit]
+        set_next_cursor(response, encode_cursor(created_at=orders[-1].created_at, id=orders[-1].id))
+    
+    return orders
+
+
+@router.get("", response_model=List[OrderSummaryResponse])
 def list_orders(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all orders for current user"""
-    orders = db.query(Order).filter(Order.user_id == current_user.id).order_by(Order.created_at.desc()).all()
-    return orders
+    """Get order summaries for current user, newest first (keyset paginated)"""
+    query = order_summaries(db).filter(Order.user_id == current_user.id)
+    return paginate_orders(query, response, cursor, limit)
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
@@ -30,7 +75,7 @@ def get_order(
     db: Session = Depends(get_db)
 ):
     """Get order details"""
-    order = db.query(Order).filter(
+    order = db.query(Order).options(selectinload(Order.items)).filter(
         Order.id == order_id,
         Order.user_id == current_user.id
     ).first()
@@ -41,51 +86,76 @@ def get_order(
     return order
 
 
-@router.post("/{order_id}/status", response_model=OrderResponse)
-async def update_order_status(
-    order_id: int,
-    status_data: OrderStatusUpdate,
-    background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-):
-    """Update order status (admin only)"""
-    order = db.query(Order).filter(Order.id == order_id).first()
+def parse_status(value: str) -> OrderStatus:
+    try:
+        return OrderStatus(value)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status")
+
+
+def _update_status(db: Session, order_id: int, target: OrderStatus) -> OrderResponse:
+    order = db.query(Order).options(selectinload(Order.items)).filter(Order.id == order_id).first()
     
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
     
-    # Validate status transition
-    valid_statuses = ["created", "paid", "packed", "shipped", "delivered", "cancelled"]
-    if status_data.status not in valid_statuses:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status")
-    
-    old_status = order.status
-    order.status = OrderStatus(status_data.status)
-    
-    # Update timestamps
-    if status_data.status == "shipped":
-        order.shipped_at = datetime.utcnow()
-        # Send notification
-        background_tasks.add_task(
-            notify_service,
-            "ORDER_SHIPPED",
-            {"order_id": order.id, "order_number": order.order_number}
+    if not can_transition(order.status, target):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot change order status from {order.status.value} to {target.value}"
         )
-    elif status_data.status == "delivered":
-        order.delivered_at = datetime.utcnow()
+    
+    if not transition_orders(db, [order.id], target):
+        # Status changed since we read it
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order status changed, please retry")
     
     db.commit()
     db.refresh(order)
     
-    return order
+    return OrderResponse.model_validate(order)
+
+
+def _bulk_update_status(db: Session, order_ids: List[int], target: OrderStatus) -> BulkOrderStatusResponse:
+    updated = transition_orders(db, order_ids, target)
+    db.commit()
+    
+    changed = set(updated)
+    return BulkOrderStatusResponse(
+        status=target.value,
+        updated=updated,
+        skipped=[order_id for order_id in dict.fromkeys(order_ids) if order_id not in changed]
+    )
+
+
+@router.post("/{order_id}/status", response_model=OrderResponse)
+async def update_order_status(
+    order_id: int,
+    status_data: OrderStatusUpdate,
+    current_user: User = Depends(get_current_admin),
+    db: DbRunner = Depends(get_async_db)
+):
+    """Update order status (admin only)"""
+    return await db.run(_update_status, order_id, parse_status(status_data.status))
 
 
-@router.get("/admin/all", response_model=List[OrderResponse])
+@router.post("/admin/bulk-status", response_model=BulkOrderStatusResponse)
+async def bulk_update_order_status(
+    update_data: BulkOrderStatusUpdate,
+    current_user: User = Depends(get_current_admin),
+    db: DbRunner = Depends(get_async_db)
+):
+    """Move many orders to one status in a single transaction (admin only); disallowed ones are skipped"""
+    return await db.run(_bulk_update_status, update_data.order_ids, parse_status(update_data.status))
+
+
+@router.get("/admin/all", response_model=List[OrderSummaryResponse])
 def list_all_orders(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Get all orders (admin only)"""
-    orders = db.query(Order).order_by(Order.created_at.desc()).all()
-    return orders
+    """Get all order summaries, newest first (admin only, keyset paginated)"""
+    return paginate_orders(order_summaries(db), response, cursor, limit)
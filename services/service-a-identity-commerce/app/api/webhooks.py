@@ -1,20 +1,17 @@
 """Stripe webhook handler"""
-from fastapi import APIRouter, Request, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
-from datetime import datetime
+from fastapi import APIRouter, Depends, Request, HTTPException, status
 
-from app.db.session import SessionLocal
-from app.models.payment import Payment, PaymentStatus
-from app.models.order import Order, OrderStatus
+from app.core.deps import get_async_db
+from app.db.runner import DbRunner
 from app.services.stripe_service import verify_webhook_signature
-from app.api.checkout import notify_service
+from app.services.webhook_processor import HANDLED_EVENT_TYPES, store_event, webhook_events, webhook_processor
 
 router = APIRouter(prefix="/payments", tags=["webhooks"])
 
 
 @router.post("/webhook")
-async def stripe_webhook(request: Request, background_tasks: BackgroundTasks):
-    """Handle Stripe webhooks"""
+async def stripe_webhook(request: Request, db: DbRunner = Depends(get_async_db)):
+    """Handle Stripe webhooks (stored and acknowledged; applied by the webhook processor)"""
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
     
@@ -26,50 +23,14 @@ async def stripe_webhook(request: Request, background_tasks: BackgroundTasks):
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    # Handle the event
-    if event["type"] == "payment_intent.succeeded":
-        payment_intent = event["data"]["object"]
-        
-        db = SessionLocal()
-        try:
-            # Update payment status
-            payment = db.query(Payment).filter(
-                Payment.stripe_payment_intent_id == payment_intent["id"]
-            ).first()
-            
-            if payment:
-                payment.status = PaymentStatus.COMPLETED
-                
-                # Update order status
-                order = db.query(Order).filter(Order.id == payment.order_id).first()
-                if order:
-                    order.status = OrderStatus.PAID
-                    order.paid_at = datetime.utcnow()
-                    
-                    # Send notification
-                    background_tasks.add_task(
-                        notify_service,
-                        "ORDER_PAID",
-                        {"order_id": order.id, "order_number": order.order_number}
-                    )
-                
-                db.commit()
-        finally:
-            db.close()
+    if event["type"] not in HANDLED_EVENT_TYPES:
+        webhook_events.inc(("ignored",))
+        return {"status": "success"}
     
-    elif event["type"] == "payment_intent.payment_failed":
-        payment_intent = event["data"]["object"]
-        
-        db = SessionLocal()
-        try:
-            payment = db.query(Payment).filter(
-                Payment.stripe_payment_intent_id == payment_intent["id"]
-            ).first()
-            
-            if payment:
-                payment.status = PaymentStatus.FAILED
-                db.commit()
-        finally:
-            db.close()
+    # Redeliveries of an already stored event are acknowledged without reprocessing
+    stored = await db.run(store_event, event, payload.decode("utf-8"))
+    webhook_events.inc(("stored" if stored else "duplicate",))
+    if stored:
+        webhook_processor.notify()
     
     return {"status": "success"}
@@ -7,21 +7,90 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DB_ASYNC: bool = False  # Async engine (psycopg async / aiosqlite) for ported routes
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True  # One extra round trip per checkout; recycle alone may suffice
     
     # JWT
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRES_MIN: int = 60
     
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: str = "process"  # process | thread
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    
+    # Principal cache (decoded tokens -> user snapshot)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    
     # Stripe
     STRIPE_SECRET_KEY: str
     STRIPE_WEBHOOK_SECRET: str
+    STRIPE_TIMEOUT: float = 10.0
+    STRIPE_MAX_RETRIES: int = 2  # Retrieves and idempotency-keyed creates only
+    STRIPE_RETRY_BACKOFF: float = 0.25
+    
+    # Stripe webhook processing
+    WEBHOOK_WORKER_ENABLED: bool = True
+    WEBHOOK_POLL_INTERVAL: float = 1.0  # Ingestion also wakes the worker immediately
+    WEBHOOK_BATCH_SIZE: int = 200
+    WEBHOOK_MAX_ATTEMPTS: int = 10
+    WEBHOOK_RETRY_DELAY: float = 5.0  # Multiplied by the attempt number
+    WEBHOOK_RETENTION_DAYS: int = 30  # Settled events older than this are purged (Stripe redelivers for 3 days); 0 keeps them
+    WEBHOOK_PURGE_INTERVAL: float = 3600.0
+    WEBHOOK_PURGE_BATCH_SIZE: int = 1000
+    
+    # Payment gateway
+    PAYMENT_GATEWAY: str = "stripe"  # stripe | fake (in-process stand-in)
+    PAYMENT_GATEWAY_WORKERS: int = 32  # Threads for blocking Stripe SDK calls
+    PAYMENT_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    PAYMENT_CIRCUIT_RESET_SECONDS: float = 30.0
+    FAKE_PAYMENT_LATENCY_MS: int = 0
     
     # External Services
     NOTIFICATIONS_URL: str
+    NOTIFICATIONS_TIMEOUT: float = 5.0
+    NOTIFICATIONS_BATCH_URL: str = ""  # e.g. http://localhost:8010/notify/batch; empty sends events one by one
     FRONTEND_URL: str
     SERVICE_B_URL: str
     
+    # Catalog lookups (Service B)
+    CATALOG_CACHE_TTL_SECONDS: float = 30.0
+    CATALOG_CACHE_SIZE: int = 10000
+    CATALOG_TIMEOUT: float = 2.0
+    
+    # Checkout
+    ORDER_NUMBER_WORKER_ID: int = -1  # 0-1023, unique per process; -1 leases a free one from the database
+    ORDER_NUMBER_WORKER_LEASE_SECONDS: int = 300  # Leased ids are renewed in the background well before this
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_LOCK_SECONDS: int = 60  # In-progress keys older than this may be reclaimed
+    
+    # Outbox relay
+    OUTBOX_RELAY_ENABLED: bool = True
+    OUTBOX_POLL_INTERVAL: float = 0.5
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_BACKOFF_BASE: float = 2.0
+    OUTBOX_BACKOFF_MAX: float = 300.0
+    OUTBOX_LEASE_SECONDS: int = 30
+    OUTBOX_RETENTION_HOURS: int = 72  # Delivered events older than this are purged; 0 keeps them
+    OUTBOX_PURGE_INTERVAL: float = 300.0
+    OUTBOX_PURGE_BATCH_SIZE: int = 1000
+    
+    # Outbound HTTP (shared client)
+    HTTP_TIMEOUT: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = False
+    HTTP_DRAIN_TIMEOUT: float = 10.0
+    
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:5173"]
     
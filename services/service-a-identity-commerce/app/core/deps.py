@@ -1,11 +1,13 @@
 """Dependency injection for FastAPI routes"""
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
-from app.db.session import SessionLocal
+from app.db.runner import DbRunner
+from app.db.session import AsyncSessionLocal, SessionLocal
 from app.core.security import decode_access_token
+from app.core.principal_cache import principal_cache, snapshot_user, user_from_snapshot
 from app.models.user import User
 
 security = HTTPBearer()
@@ -20,12 +22,30 @@ def get_db() -> Generator:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[DbRunner, None]:
+    """Async database dependency (async engine when DB_ASYNC is set, else threadpool)"""
+    if AsyncSessionLocal is not None:
+        runner = DbRunner(AsyncSessionLocal())
+    else:
+        runner = DbRunner(SessionLocal())
+    try:
+        yield runner
+    finally:
+        await runner.close()
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
     """Get current authenticated user"""
     token = credentials.credentials
+    
+    # Tokens are only cached after a successful decode and user lookup
+    snapshot = principal_cache.get(token)
+    if snapshot is not None:
+        return user_from_snapshot(snapshot)
+    
     payload = decode_access_token(token)
     
     user_id: Optional[int] = payload.get("sub")
@@ -42,6 +62,7 @@ def get_current_user(
             detail="User not found"
         )
     
+    principal_cache.put(token, user.id, snapshot_user(user), payload.get("exp"))
     return user
 
 
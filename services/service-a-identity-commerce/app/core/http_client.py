@@ -0,0 +1,89 @@
+"""Application-lifetime HTTP client for calls to other services
+
+One pooled ``httpx.AsyncClient`` is shared by every request so notification
+sends reuse keepalive connections instead of paying TCP/TLS setup per event.
+The FastAPI lifespan starts it and, on shutdown, waits for in-flight sends
+before closing the pool.
+"""
+import asyncio
+from typing import Any, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import track_outbound
+
+
+class ServiceHttpClient:
+    """Shared pooled async HTTP client with in-flight tracking"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight = 0
+        self._idle: Optional[asyncio.Event] = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = settings.HTTP2_ENABLED
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("HTTP2_ENABLED is set but the 'h2' package is not installed; using HTTP/1.1")
+                http2 = False
+
+        return httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    async def start(self) -> None:
+        """Create the connection pool (idempotent)"""
+        if self._client is None:
+            self._client = self._build_client()
+            self._idle = asyncio.Event()
+            self._idle.set()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = self._build_client()
+            self._idle = asyncio.Event()
+            self._idle.set()
+        return self._client
+
+    async def post(
+        self, url: str, timeout: Optional[float] = None, target: str = "other", **kwargs: Any
+    ) -> httpx.Response:
+        """POST through the shared pool; timeout overrides the default per call"""
+        client = self.client
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            if timeout is not None:
+                kwargs["timeout"] = timeout
+            with track_outbound(target, "POST"):
+                return await client.post(url, **kwargs)
+        finally:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.set()
+
+    async def aclose(self, drain_timeout: Optional[float] = None) -> None:
+        """Wait for in-flight requests, then close the pool"""
+        if self._client is None:
+            return
+        drain_timeout = settings.HTTP_DRAIN_TIMEOUT if drain_timeout is None else drain_timeout
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"Closing HTTP client with {self._in_flight} request(s) still in flight")
+        await self._client.aclose()
+        self._client = None
+
+
+http_client = ServiceHttpClient()
@@ -0,0 +1,257 @@
+"""Lightweight in-process metrics with Prometheus text exposition
+
+``MetricsMiddleware`` records request count, latency and in-flight requests
+per route template (``/orders/{order_id}`` is one series, whatever the id).
+Outbound calls are timed with ``track_outbound``. ``registry.render()``
+produces the body served on ``/metrics``.
+
+The services are built and deployed independently and share no package, so
+this module is copied verbatim into Services A, B and C; change all three.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Seconds; tuned for DB pool waits and request latencies
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus ``le`` semantics"""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Dict:
+        """Cumulative bucket counts keyed by upper bound"""
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+        buckets = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            buckets[str(bound)] = running
+        buckets["+Inf"] = count
+        return {"buckets": buckets, "sum": total, "count": count}
+
+    def render(self, name: str, label_names: Tuple[str, ...] = (), label_values: Tuple[str, ...] = ()) -> List[str]:
+        snapshot = self.snapshot()
+        lines = []
+        for bound, count in snapshot["buckets"].items():
+            labels = format_labels(label_names + ("le",), label_values + (bound,))
+            lines.append(f"{name}_bucket{labels} {count}")
+        labels = format_labels(label_names, label_values)
+        lines.append(f"{name}_sum{labels} {snapshot['sum']}")
+        lines.append(f"{name}_count{labels} {snapshot['count']}")
+        return lines
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter per label set"""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{format_labels(self.label_names, labels)} {value}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Value that goes up and down per label set"""
+    kind = "gauge"
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+class LabeledHistogram(_Metric):
+    """One Histogram per label set"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        histogram = self._series.get(labels)
+        if histogram is None:
+            with self._lock:
+                histogram = self._series.setdefault(labels, Histogram(self.buckets))
+        histogram.observe(value)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, histogram in sorted(self._series.items()):
+            lines.extend(histogram.render(self.name, self.label_names, labels))
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric of the process; collectors add extra lines at render time"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors = []
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, label_names))
+
+    def gauge(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, label_names))
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> LabeledHistogram:
+        return self._register(LabeledHistogram(name, help_text, label_names, buckets))
+
+    def add_collector(self, collector) -> None:
+        """collector() returns exposition lines; called on every scrape"""
+        self._collectors.append(collector)
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+)
+http_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled", ("method", "route")
+)
+outbound_latency = registry.histogram(
+    "outbound_request_duration_seconds", "Calls to external services", ("target", "operation", "outcome")
+)
+
+
+@contextmanager
+def track_outbound(target: str, operation: str) -> Iterator[None]:
+    """Time an outbound call; exceptions are recorded with outcome=error"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        outbound_latency.observe((target, operation, outcome), time.perf_counter() - started)
+
+
+def route_template(scope) -> str:
+    """Route template of a request scope, resolved against the app's routes"""
+    from starlette.routing import Match
+
+    partial: Optional[str] = None
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+        if match == Match.PARTIAL and partial is None:
+            partial = getattr(route, "path", None)
+    return partial or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route request metrics"""
+
+    MAX_CACHED_PATHS = 4096
+
+    def __init__(self, app):
+        self.app = app
+        self._templates: Dict[Tuple[str, str], str] = {}
+
+    def _route(self, scope) -> str:
+        key = (scope["method"], scope["path"])
+        route = self._templates.get(key)
+        if route is None:
+            route = route_template(scope)
+            if len(self._templates) >= self.MAX_CACHED_PATHS:
+                self._templates.clear()
+            self._templates[key] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        labels = (scope["method"], self._route(scope))
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_flight.inc(labels)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_latency.observe(labels, time.perf_counter() - started)
+            http_requests.inc(labels + (str(status_code),))
+            http_in_flight.dec(labels)
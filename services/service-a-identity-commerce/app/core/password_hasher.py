@@ -0,0 +1,81 @@
+"""Dedicated executor for bcrypt hashing and verification
+
+bcrypt is deliberately slow; running it on the request threadpool lets a burst
+of logins starve every other sync route. Hashing is sent to a small process
+pool instead, with a bounded number of queued jobs. When the queue is full the
+request is rejected with 429 rather than piling up.
+"""
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.security import get_password_hash, pwd_context
+
+
+def _hash_password(password: str) -> str:
+    return get_password_hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    # Returns a replacement hash when the stored one uses deprecated settings
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded worker pool"""
+
+    def __init__(self, workers: int, queue_size: int, executor_type: str = "process"):
+        self.workers = workers
+        self.executor_type = executor_type
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Create the worker pool (idempotent)"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            if self.executor_type == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwhash")
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def shutdown(self) -> None:
+        """Wait for in-flight jobs and stop the workers"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    async def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many authentication requests, please retry",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            self.start()
+            return await asyncio.wrap_future(self._executor.submit(fn, *args))
+        finally:
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        """Hash a password off the request path"""
+        return await self._run(_hash_password, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also returns a new hash if the stored one needs upgrading"""
+        return await self._run(_verify_and_update, password, hashed_password)
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+)
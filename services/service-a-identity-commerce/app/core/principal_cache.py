@@ -0,0 +1,105 @@
+"""In-process cache of authenticated principals keyed by access token"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.user import User
+
+USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+
+class PrincipalCache:
+    """Bounded LRU cache with per-entry TTL and invalidation by user id"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[int, Dict, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[Dict]:
+        """Get the cached user snapshot for a token"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[2] <= now:
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token: str, user_id: int, snapshot: Dict, token_exp: Optional[float] = None) -> None:
+        """Cache a user snapshot; never outlives the token's own expiry"""
+        if self.max_size <= 0:
+            return
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[token] = (user_id, snapshot, time.monotonic() + ttl)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached token for a user"""
+        with self._lock:
+            stale = [token for token, entry in self._entries.items() if entry[0] == user_id]
+            for token in stale:
+                del self._entries[token]
+            self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Counters for monitoring the cache hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+def snapshot_user(user: User) -> Dict:
+    """Copy the column values of a user row"""
+    return {key: getattr(user, key) for key in USER_COLUMNS}
+
+
+def user_from_snapshot(snapshot: Dict) -> User:
+    """Build a detached User from a cached snapshot (fresh object per request)"""
+    return User(**snapshot)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User) -> None:
+    """Evict cached principals whenever a user row changes"""
+    principal_cache.invalidate_user(target.id)
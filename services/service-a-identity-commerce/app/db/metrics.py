@@ -0,0 +1,240 @@
+"""Connection pool and query instrumentation
+
+Both engines report into ``db_metrics`` through SQLAlchemy pool and cursor
+events: pool occupancy, time spent waiting for a connection, overflow and
+pre-ping failures, and query count/time. Queries are also attributed to the
+route template of the request that issued them (``GET /orders/{order_id}``)
+by ``DbMetricsMiddleware``. The same numbers are exported on ``/metrics``.
+
+Like ``app.core.metrics``, this module is copied verbatim into Services A and
+B; change both.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.metrics import Histogram, registry
+
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class QueryStats:
+    """Queries issued while handling one request"""
+    __slots__ = ("count", "seconds", "parent")
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.count = 0
+        self.seconds = 0.0
+        self.parent = parent  # Enclosing counter (e.g. count_queries around a test request)
+
+
+class RouteQueryStats:
+    __slots__ = ("requests", "queries", "seconds", "max_queries")
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.seconds = 0.0
+        self.max_queries = 0
+
+
+# Set per request; threadpool and run_sync greenlets inherit the context
+_request_queries: ContextVar[Optional[QueryStats]] = ContextVar("db_request_queries", default=None)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Count queries issued inside the block (e.g. to assert a route has no N+1)"""
+    stats = QueryStats(_request_queries.get())
+    token = _request_queries.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_queries.reset(token)
+
+
+class DbMetrics:
+    """Process-wide DB counters fed by engine events"""
+
+    def __init__(self):
+        self.acquire_wait = Histogram(WAIT_BUCKETS)
+        self.pool_timeouts = 0
+        self.connections_opened = 0
+        self.overflow_connections = 0
+        self.pre_ping_failures = 0
+        self.invalidations = 0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.routes: Dict[str, RouteQueryStats] = {}
+        self._pools: Dict[str, Pool] = {}
+
+    def instrument(self, name: str, engine) -> None:
+        """Attach listeners to an Engine or AsyncEngine"""
+        sync_engine = getattr(engine, "sync_engine", engine)
+        pool = sync_engine.pool
+        self._pools[name] = pool
+
+        @event.listens_for(pool, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            self.connections_opened += 1
+            overflow = getattr(pool, "overflow", None)
+            if overflow is not None and overflow() > 0:
+                self.overflow_connections += 1
+
+        @event.listens_for(pool, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            self.invalidations += 1
+            # Failed pre-pings surface as a DisconnectionError on checkout
+            if isinstance(exception, exc.DisconnectionError):
+                self.pre_ping_failures += 1
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["query_started"].pop()
+            self.queries += 1
+            self.query_seconds += elapsed
+            stats = _request_queries.get()
+            while stats is not None:
+                stats.count += 1
+                stats.seconds += elapsed
+                stats = stats.parent
+
+    def observe_wait(self, seconds: float) -> None:
+        self.acquire_wait.observe(seconds)
+
+    def record_route(self, route: str, stats: QueryStats) -> None:
+        entry = self.routes.get(route)
+        if entry is None:
+            entry = self.routes.setdefault(route, RouteQueryStats())
+        entry.requests += 1
+        entry.queries += stats.count
+        entry.seconds += stats.seconds
+        entry.max_queries = max(entry.max_queries, stats.count)
+
+    def snapshot(self) -> Dict:
+        pools = {}
+        for name, pool in self._pools.items():
+            pools[name] = {
+                "class": type(pool).__name__,
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "overflow": max(pool.overflow(), 0) if hasattr(pool, "overflow") else None,
+            }
+        return {
+            "pools": pools,
+            "acquire_wait_seconds": self.acquire_wait.snapshot(),
+            "pool_timeouts": self.pool_timeouts,
+            "connections_opened": self.connections_opened,
+            "overflow_connections": self.overflow_connections,
+            "pre_ping_failures": self.pre_ping_failures,
+            "invalidations": self.invalidations,
+            "queries": self.queries,
+            "query_seconds": self.query_seconds,
+            "routes": {
+                route: {
+                    "requests": entry.requests,
+                    "queries": entry.queries,
+                    "query_seconds": entry.seconds,
+                    "queries_per_request": entry.queries / entry.requests,
+                    "max_queries": entry.max_queries,
+                }
+                for route, entry in sorted(self.routes.items())
+            },
+        }
+
+    def render(self) -> List[str]:
+        """Prometheus exposition lines for /metrics"""
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP db_pool_connections Pool connections by state",
+            "# TYPE db_pool_connections gauge",
+        ]
+        for name, pool in snapshot["pools"].items():
+            for state in ("checked_out", "checked_in", "overflow"):
+                if pool[state] is not None:
+                    lines.append(f'db_pool_connections{{pool="{name}",state="{state}"}} {pool[state]}')
+        lines += ["# HELP db_pool_acquire_wait_seconds Time spent waiting for a pooled connection",
+                  "# TYPE db_pool_acquire_wait_seconds histogram"]
+        lines += self.acquire_wait.render("db_pool_acquire_wait_seconds")
+        for name, help_text in (
+            ("pool_timeouts", "Checkouts that timed out waiting for a connection"),
+            ("connections_opened", "DBAPI connections opened"),
+            ("overflow_connections", "Connections opened beyond pool_size"),
+            ("pre_ping_failures", "Pooled connections found dead by pre-ping"),
+            ("invalidations", "Pooled connections invalidated"),
+            ("queries", "Queries executed"),
+            ("query_seconds", "Time spent executing queries"),
+        ):
+            lines += [f"# HELP db_{name}_total {help_text}", f"# TYPE db_{name}_total counter",
+                      f"db_{name}_total {snapshot[name]}"]
+        lines += ["# HELP db_route_queries_total Queries issued per route template",
+                  "# TYPE db_route_queries_total counter"]
+        lines += [f'db_route_queries_total{{route="{route}"}} {entry["queries"]}'
+                  for route, entry in snapshot["routes"].items()]
+        lines += ["# HELP db_route_query_seconds_total Query time per route template",
+                  "# TYPE db_route_query_seconds_total counter"]
+        lines += [f'db_route_query_seconds_total{{route="{route}"}} {entry["query_seconds"]}'
+                  for route, entry in snapshot["routes"].items()]
+        return lines
+
+
+db_metrics = DbMetrics()
+registry.add_collector(db_metrics.render)
+
+
+class _TimedCheckout:
+    """Records how long each checkout waited on the pool (QueuePool subclasses)"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            db_metrics.pool_timeouts += 1
+            raise
+        finally:
+            db_metrics.observe_wait(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def route_name(scope) -> str:
+    """Route template for a request scope, so path params do not create new series"""
+    route = scope.get("route")
+    path = getattr(route, "path", None) or "unmatched"
+    return f"{scope['method']} {path}"
+
+
+class DbMetricsMiddleware:
+    """Attribute queries issued while handling a request to its route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(_request_queries.get())
+        token = _request_queries.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_queries.reset(token)
+            db_metrics.record_route(route_name(scope), stats)
@@ -1,14 +1,48 @@
 """Main FastAPI application for Service A - Identity & Commerce"""
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.password_hasher import password_hasher
+from app.core.principal_cache import principal_cache
+from app.core.http_client import http_client
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.db.metrics import DbMetricsMiddleware, db_metrics
+from app.db.session import async_engine
+from app.services.catalog_client import catalog_client
+from app.services.order_numbers import worker_lease
+from app.services.outbox import outbox_relay
+from app.services.payment_gateway import payment_gateway
+from app.services.webhook_processor import webhook_processor
 from app.api import auth, addresses, cart, checkout, orders, webhooks
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop application-lifetime resources"""
+    password_hasher.start()
+    await http_client.start()
+    outbox_relay.start()
+    payment_gateway.start()
+    webhook_processor.start()
+    worker_lease.start()
+    yield
+    await webhook_processor.stop()
+    await outbox_relay.stop()
+    await worker_lease.stop()
+    payment_gateway.shutdown()
+    await http_client.aclose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    password_hasher.shutdown()
+
+
 app = FastAPI(
     title="Service A - Identity & Commerce",
     description="Authentication, users, cart, checkout, orders, and payments",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -18,7 +52,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Idempotent-Replayed"],
 )
+app.add_middleware(DbMetricsMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(auth.router)
@@ -42,4 +79,26 @@ def root():
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "principal_cache": principal_cache.stats(),
+        "outbox": outbox_relay.stats(),
+        "webhooks": webhook_processor.stats(),
+        "catalog_client": catalog_client.stats()
+    }
+
+
+@app.get("/health/db")
+def db_health():
+    """Connection pool and query metrics, plus backlogs that need a query to measure"""
+    return {
+        **db_metrics.snapshot(),
+        "outbox": outbox_relay.backlog(),
+        "webhooks": webhook_processor.backlog()
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
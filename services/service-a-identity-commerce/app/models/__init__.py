@@ -4,6 +4,10 @@ from app.models.address import Address, AddressType
 from app.models.cart import Cart, CartItem
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.payment import Payment, PaymentStatus
+from app.models.outbox import OutboxEvent, OutboxStatus
+from app.models.idempotency import IdempotencyKey, IdempotencyStatus
+from app.models.webhook import WebhookEvent, WebhookStatus
+from app.models.order_number_worker import OrderNumberWorker
 
 __all__ = [
     "User",
@@ -17,4 +21,11 @@ __all__ = [
     "OrderStatus",
     "Payment",
     "PaymentStatus",
+    "OutboxEvent",
+    "OutboxStatus",
+    "IdempotencyKey",
+    "IdempotencyStatus",
+    "WebhookEvent",
+    "WebhookStatus",
+    "OrderNumberWorker",
 ]
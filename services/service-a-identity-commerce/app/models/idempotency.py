@@ -0,0 +1,33 @@
+"""Idempotency key model"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, UniqueConstraint
+from datetime import datetime
+import enum
+
+from app.db.session import Base
+
+
+class IdempotencyStatus(str, enum.Enum):
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status = Column(Enum(IdempotencyStatus), default=IdempotencyStatus.IN_PROGRESS, nullable=False)
+
+    # Stored response, replayed for retries of a completed request
+    response_status = Column(Integer)
+    response_body = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime)
+
+    __table_args__ = (
+        # Keys are scoped per user; the constraint is what serializes concurrent retries
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+    )
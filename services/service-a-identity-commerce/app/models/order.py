@@ -1,5 +1,5 @@
 """Order and OrderItem models"""
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -35,7 +35,7 @@ class Order(Base):
     billing_address = Column(Text, nullable=False)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     paid_at = Column(DateTime, nullable=True)
     shipped_at = Column(DateTime, nullable=True)
@@ -45,13 +45,18 @@ class Order(Base):
     user = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     payment = relationship("Payment", back_populates="order", uselist=False, cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Order history: one user's orders newest first (id breaks created_at ties)
+        Index("ix_orders_user_id_created_at", "user_id", "created_at", "id"),
+    )
 
 
 class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     product_id = Column(Integer, nullable=False)
     variant_id = Column(Integer, nullable=True)
     sku = Column(String, nullable=False)
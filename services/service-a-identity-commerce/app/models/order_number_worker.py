@@ -0,0 +1,12 @@
+"""Order number worker id lease model"""
+from sqlalchemy import Column, Integer, String, DateTime
+
+from app.db.session import Base
+
+
+class OrderNumberWorker(Base):
+    __tablename__ = "order_number_workers"
+
+    worker_id = Column(Integer, primary_key=True, autoincrement=False)  # 0-1023
+    owner = Column(String(255), nullable=False)  # host:pid:nonce of the holding process
+    leased_until = Column(DateTime, nullable=False)  # Free for another process once passed
@@ -0,0 +1,36 @@
+"""Stripe webhook event model"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index
+from datetime import datetime
+import enum
+
+from app.db.session import Base
+
+
+class WebhookStatus(str, enum.Enum):
+    PENDING = "pending"
+    PROCESSED = "processed"
+    FAILED = "failed"  # Gave up after WEBHOOK_MAX_ATTEMPTS
+
+
+class WebhookEvent(Base):
+    __tablename__ = "webhook_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    stripe_event_id = Column(String, unique=True, nullable=False)  # Redeliveries collide here
+    event_type = Column(String, nullable=False)
+    payment_intent_id = Column(String, index=True)
+    stripe_created_at = Column(DateTime)  # When Stripe created the event
+    payload = Column(Text, nullable=False)  # Raw event JSON
+    status = Column(Enum(WebhookStatus), default=WebhookStatus.PENDING, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text)
+    received_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime)
+
+    __table_args__ = (
+        # Worker polls pending rows that are due
+        Index("ix_webhook_events_status_next_attempt_at", "status", "next_attempt_at"),
+        # Retention purge finds old settled rows
+        Index("ix_webhook_events_status_received_at", "status", "received_at"),
+    )
@@ -0,0 +1,12 @@
+"""Catalog schemas (data resolved from Service B)"""
+from pydantic import BaseModel
+
+
+class CatalogVariant(BaseModel):
+    sku: str
+    variant_id: int
+    product_id: int
+    product_name: str
+    variant_name: str
+    price: float
+    is_active: bool = True
@@ -1,5 +1,5 @@
 """Order schemas"""
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -38,10 +38,37 @@ class OrderResponse(BaseModel):
         from_attributes = True
 
 
+class OrderSummaryResponse(BaseModel):
+    """Order list entry (items and addresses are on the detail view)"""
+    id: int
+    order_number: str
+    status: str
+    total: float
+    item_count: int
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 class OrderStatusUpdate(BaseModel):
     status: str
 
 
+MAX_BULK_ORDERS = 10000
+
+
+class BulkOrderStatusUpdate(BaseModel):
+    order_ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_ORDERS)
+    status: str
+
+
+class BulkOrderStatusResponse(BaseModel):
+    status: str
+    updated: List[int]
+    skipped: List[int]  # Not found, or the transition is not allowed from their current status
+
+
 class CheckoutRequest(BaseModel):
     shipping_address_id: int
     billing_address_id: int
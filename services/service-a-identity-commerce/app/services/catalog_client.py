@@ -0,0 +1,148 @@
+"""Client for SKU pricing lookups against Service B
+
+Prices and product names for any number of SKUs are resolved with one call
+to Service B's ``/catalog/variants/batch`` endpoint. Results are kept in a
+short-TTL local cache, and concurrent requests that miss on the same SKUs
+share a single in-flight upstream call instead of each issuing their own.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.http_client import http_client
+from app.schemas.catalog import CatalogVariant
+
+BATCH_LIMIT = 500  # Matches the max batch size accepted by Service B
+
+
+class CatalogUnavailableError(Exception):
+    """Service B could not be reached or returned an error"""
+
+
+class CatalogClient:
+    """Batched, cached and coalesced SKU lookups"""
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._cache: "OrderedDict[str, Tuple[CatalogVariant, float]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+
+    def _cached(self, sku: str, now: float) -> Optional[CatalogVariant]:
+        entry = self._cache.get(sku)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._cache[sku]
+            return None
+        self._cache.move_to_end(sku)
+        return entry[0]
+
+    def _store(self, variant: CatalogVariant, now: float) -> None:
+        self._cache[variant.sku] = (variant, now + self.ttl_seconds)
+        self._cache.move_to_end(variant.sku)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    async def _fetch(self, skus: List[str]) -> Dict[str, CatalogVariant]:
+        """One upstream call per BATCH_LIMIT SKUs"""
+        chunks = [skus[i:i + BATCH_LIMIT] for i in range(0, len(skus), BATCH_LIMIT)]
+        self.upstream_calls += len(chunks)
+        try:
+            responses = await asyncio.gather(*(
+                http_client.post(
+                    f"{settings.SERVICE_B_URL}/catalog/variants/batch",
+                    json={"skus": chunk},
+                    timeout=settings.CATALOG_TIMEOUT,
+                    target="catalog"
+                )
+                for chunk in chunks
+            ))
+            variants = {}
+            for response in responses:
+                response.raise_for_status()
+                for item in response.json():
+                    variant = CatalogVariant(**item)
+                    variants[variant.sku] = variant
+            return variants
+        except Exception as e:
+            raise CatalogUnavailableError(f"Catalog lookup failed: {e}") from e
+
+    async def get_variants(self, skus: Iterable[str]) -> Dict[str, CatalogVariant]:
+        """Resolve SKUs to catalog variants; unknown SKUs are absent from the result"""
+        now = time.monotonic()
+        result: Dict[str, CatalogVariant] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        to_fetch: List[str] = []
+
+        for sku in dict.fromkeys(skus):
+            variant = self._cached(sku, now)
+            if variant is not None:
+                self.hits += 1
+                result[sku] = variant
+            elif sku in self._in_flight:
+                waiting[sku] = self._in_flight[sku]
+            else:
+                self.misses += 1
+                to_fetch.append(sku)
+
+        if to_fetch:
+            loop = asyncio.get_running_loop()
+            futures = {sku: loop.create_future() for sku in to_fetch}
+            self._in_flight.update(futures)
+            try:
+                fetched = await self._fetch(to_fetch)
+                stored_at = time.monotonic()
+                for sku, future in futures.items():
+                    variant = fetched.get(sku)
+                    if variant is not None:
+                        self._store(variant, stored_at)
+                        result[sku] = variant
+                    if not future.done():
+                        future.set_result(variant)
+            except BaseException as e:
+                # Includes cancellation of this (leading) request: every follower must be woken
+                error = e if isinstance(e, CatalogUnavailableError) else CatalogUnavailableError(
+                    f"Catalog lookup failed: {e!r}"
+                )
+                for future in futures.values():
+                    if future.done():
+                        continue
+                    future.set_exception(error)
+                    # Waiters re-raise it; mark as retrieved for futures nobody awaited
+                    future.add_done_callback(lambda f: f.exception())
+                raise
+            finally:
+                for sku in to_fetch:
+                    self._in_flight.pop(sku, None)
+
+        for sku, future in waiting.items():
+            # Shielded so a cancelled waiter does not cancel the shared lookup
+            variant = await asyncio.shield(future)
+            if variant is not None:
+                result[sku] = variant
+
+        return result
+
+    async def get_variant(self, sku: str) -> Optional[CatalogVariant]:
+        return (await self.get_variants([sku])).get(sku)
+
+    def stats(self) -> Dict:
+        return {
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "upstream_calls": self.upstream_calls,
+            "in_flight": len(self._in_flight),
+        }
+
+
+catalog_client = CatalogClient(
+    ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS,
+    max_size=settings.CATALOG_CACHE_SIZE
+)
@@ -0,0 +1,122 @@
+"""Idempotency-Key handling for checkout
+
+A request carrying an ``Idempotency-Key`` header first claims the key by
+inserting an ``in_progress`` row; the unique ``(user_id, key)`` constraint
+makes concurrent retries lose that race. The successful response is stored
+in the same transaction that commits the order, so a retry either replays
+exactly that response or finds no trace of the first attempt. Failed
+attempts release the key so the client can retry.
+
+Reusing a key with a different request body is rejected. A key stuck
+``in_progress`` (e.g. the process died mid-request) can be reclaimed after
+``IDEMPOTENCY_LOCK_SECONDS``, and keys expire after ``IDEMPOTENCY_KEY_TTL_HOURS``.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from fastapi import Response
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey, IdempotencyStatus
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyKeyInUse(Exception):
+    """Another request with this key is still being processed"""
+
+
+class IdempotencyKeyMismatch(Exception):
+    """The key was already used with a different request body"""
+
+
+def request_fingerprint(payload: Dict) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def claim_key(db: Session, user_id: int, key: str, request_hash: str) -> Optional[IdempotencyKey]:
+    """
+    Claim key for a new request (commits). Returns None once claimed, or the
+    completed record whose response should be replayed.
+    """
+    db.add(IdempotencyKey(user_id=user_id, key=key, request_hash=request_hash))
+    try:
+        db.commit()
+        return None
+    except IntegrityError:
+        db.rollback()
+
+    now = datetime.utcnow()
+    existing = db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key
+    ).first()
+    if existing is None:
+        # Released between our insert and this read
+        return claim_key(db, user_id, key, request_hash)
+
+    expired = existing.created_at < now - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    abandoned = (
+        existing.status == IdempotencyStatus.IN_PROGRESS
+        and existing.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+    )
+    if expired or abandoned:
+        # Conditional update so only one of several concurrent retries takes it over
+        reclaimed = db.query(IdempotencyKey).filter(
+            IdempotencyKey.id == existing.id,
+            IdempotencyKey.status == existing.status,
+            IdempotencyKey.created_at == existing.created_at
+        ).update({
+            "request_hash": request_hash,
+            "status": IdempotencyStatus.IN_PROGRESS,
+            "response_status": None,
+            "response_body": None,
+            "created_at": now,
+            "completed_at": None
+        }, synchronize_session=False)
+        db.commit()
+        if reclaimed:
+            return None
+        raise IdempotencyKeyInUse()
+
+    if existing.request_hash != request_hash:
+        raise IdempotencyKeyMismatch()
+    if existing.status == IdempotencyStatus.IN_PROGRESS:
+        raise IdempotencyKeyInUse()
+    return existing
+
+
+def complete_key(db: Session, user_id: int, key: str, status_code: int, body: str) -> None:
+    """Store the response; committed together with the caller's transaction"""
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key
+    ).update({
+        "status": IdempotencyStatus.COMPLETED,
+        "response_status": status_code,
+        "response_body": body,
+        "completed_at": datetime.utcnow()
+    }, synchronize_session=False)
+
+
+def release_key(db: Session, user_id: int, key: str) -> None:
+    """Forget an in-progress key after a failed attempt (commits)"""
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def replay_response(record: IdempotencyKey) -> Response:
+    return Response(
+        content=record.response_body,
+        status_code=record.response_status,
+        media_type="application/json",
+        headers={REPLAY_HEADER: "true"}
+    )
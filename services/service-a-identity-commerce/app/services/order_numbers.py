@@ -0,0 +1,221 @@
+"""Collision-free order numbers
+
+Order numbers embed a snowflake-style id: milliseconds since ``EPOCH_MS``
+(41 bits), a worker id (10 bits) and a per-millisecond sequence (12 bits).
+Ids from one worker are strictly increasing, and ids from workers with
+different worker ids never collide, so no database round trip or retry is
+needed per order. If a worker exhausts the sequence within a millisecond, or
+the clock steps backwards, it continues from the last millisecond it issued
+instead of waiting.
+
+Each process needs its own worker id. Set ``ORDER_NUMBER_WORKER_ID``
+explicitly, or leave it at -1 and the process leases a free id from the
+``order_number_workers`` table. The lease is renewed in the background and
+checked before every order number, so a process whose lease lapsed takes a
+new id rather than issuing numbers another process may now own.
+"""
+import asyncio
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.order_number_worker import OrderNumberWorker
+
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+def lease_worker_id(db: Session, owner: str, worker_id: Optional[int] = None) -> Tuple[int, datetime]:
+    """Renew ``worker_id`` for ``owner`` or lease a free one; returns (worker_id, leased_until)"""
+    now = datetime.utcnow()
+    leased_until = now + timedelta(seconds=settings.ORDER_NUMBER_WORKER_LEASE_SECONDS)
+
+    if worker_id is not None:
+        # Still ours unless another process took it over after it lapsed
+        renewed = db.query(OrderNumberWorker).filter(
+            OrderNumberWorker.worker_id == worker_id,
+            OrderNumberWorker.owner == owner
+        ).update({"leased_until": leased_until}, synchronize_session=False)
+        db.commit()
+        if renewed:
+            return worker_id, leased_until
+
+    for _ in range(MAX_WORKER_ID + 1):
+        expired = db.query(OrderNumberWorker.worker_id).filter(
+            OrderNumberWorker.leased_until <= now
+        ).order_by(OrderNumberWorker.worker_id).first()
+        if expired:
+            # Conditional, so only one of several racing processes takes it
+            taken = db.query(OrderNumberWorker).filter(
+                OrderNumberWorker.worker_id == expired.worker_id,
+                OrderNumberWorker.leased_until <= now
+            ).update({"owner": owner, "leased_until": leased_until}, synchronize_session=False)
+            db.commit()
+            if taken:
+                return expired.worker_id, leased_until
+            continue
+
+        highest = db.query(func.max(OrderNumberWorker.worker_id)).scalar()
+        candidate = 0 if highest is None else highest + 1
+        if candidate > MAX_WORKER_ID:
+            break
+        db.add(OrderNumberWorker(worker_id=candidate, owner=owner, leased_until=leased_until))
+        try:
+            db.commit()
+            return candidate, leased_until
+        except IntegrityError:
+            # Another process inserted the same id first
+            db.rollback()
+
+    raise RuntimeError(f"No free order number worker id (all {MAX_WORKER_ID + 1} are leased)")
+
+
+def release_worker_id(db: Session, owner: str, worker_id: int) -> None:
+    """Let another process take the id straight away"""
+    db.query(OrderNumberWorker).filter(
+        OrderNumberWorker.worker_id == worker_id,
+        OrderNumberWorker.owner == owner
+    ).update({"leased_until": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+
+class WorkerIdLease:
+    """This process's leased worker id, renewed in the background while the app runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._pid: Optional[int] = None
+        self.owner = ""
+        self.worker_id: Optional[int] = None
+        self.leased_until: Optional[datetime] = None
+
+    def current(self) -> int:
+        """Worker id that is safe to issue numbers with right now"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked child must not reuse its parent's lease
+                self._pid = os.getpid()
+                self.owner = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}"
+                self.worker_id = None
+            half_lease = timedelta(seconds=settings.ORDER_NUMBER_WORKER_LEASE_SECONDS / 2)
+            if self.worker_id is None or datetime.utcnow() >= self.leased_until - half_lease:
+                # Normally renewed by the background task; this covers scripts and a stalled loop
+                self._renew()
+            return self.worker_id
+
+    def renew(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid() and self.worker_id is not None:
+                self._renew()
+
+    def _renew(self) -> None:
+        db = SessionLocal()
+        try:
+            self.worker_id, self.leased_until = lease_worker_id(db, self.owner, self.worker_id)
+        finally:
+            db.close()
+
+    def start(self) -> None:
+        """Lease an id up front and keep it renewed (only when no explicit id is configured)"""
+        if self._task is None and settings.ORDER_NUMBER_WORKER_ID < 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.to_thread(self._release)
+
+    async def _run(self) -> None:
+        interval = settings.ORDER_NUMBER_WORKER_LEASE_SECONDS / 3
+        while True:
+            try:
+                if self.worker_id is None:
+                    await asyncio.to_thread(self.current)
+                else:
+                    await asyncio.to_thread(self.renew)
+            except Exception as e:
+                print(f"Order number worker lease error: {e}")
+            await asyncio.sleep(interval)
+
+    def _release(self) -> None:
+        with self._lock:
+            if self._pid != os.getpid() or self.worker_id is None:
+                return
+            db = SessionLocal()
+            try:
+                release_worker_id(db, self.owner, self.worker_id)
+            except Exception as e:
+                print(f"Could not release order number worker id {self.worker_id}: {e}")
+            finally:
+                db.close()
+            self.worker_id = None
+
+
+class OrderNumberGenerator:
+    """Thread-safe snowflake id generator for one worker"""
+
+    def __init__(self, worker_id: int):
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"Worker id must be between 0 and {MAX_WORKER_ID}")
+        self.worker_id = worker_id
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self) -> int:
+        with self._lock:
+            now_ms = max(int(time.time() * 1000), self._last_ms)
+            if now_ms == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # Sequence exhausted for this millisecond: borrow the next one
+                    now_ms += 1
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+            return ((now_ms - EPOCH_MS) << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def next_order_number(self) -> str:
+        """Order number such as ``ORD-20260114-3094716598212608``"""
+        snowflake = self.next_id()
+        issued_at = datetime.utcfromtimestamp(((snowflake >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS) / 1000)
+        return f"ORD-{issued_at.strftime('%Y%m%d')}-{snowflake}"
+
+
+worker_lease = WorkerIdLease()
+_generator: Optional[OrderNumberGenerator] = None
+_generator_lock = threading.Lock()
+
+
+def next_order_number() -> str:
+    """Next order number for this process"""
+    global _generator
+    worker_id = settings.ORDER_NUMBER_WORKER_ID
+    if worker_id < 0:
+        worker_id = worker_lease.current()
+    with _generator_lock:
+        # Replaced whenever the lease hands this process a different id
+        if _generator is None or _generator.worker_id != worker_id:
+            _generator = OrderNumberGenerator(worker_id)
+        generator = _generator
+    return generator.next_order_number()
@@ -0,0 +1,93 @@
+"""Order status state machine
+
+``TRANSITIONS`` lists where each status may move next. Orders advance
+created -> paid -> packed -> shipped -> delivered and can be cancelled until
+they ship. ``transition_orders`` applies one target status to any number of
+orders with set-based UPDATEs: the allowed source statuses are part of the
+WHERE clause, so an order whose status changed concurrently is skipped rather
+than overwritten, and notifications are enqueued with one INSERT.
+"""
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.order import Order, OrderStatus
+from app.models.user import User
+from app.services.outbox import enqueue_events
+
+TRANSITIONS: Dict[OrderStatus, FrozenSet[OrderStatus]] = {
+    OrderStatus.CREATED: frozenset({OrderStatus.PAID, OrderStatus.CANCELLED}),
+    OrderStatus.PAID: frozenset({OrderStatus.PACKED, OrderStatus.CANCELLED}),
+    OrderStatus.PACKED: frozenset({OrderStatus.SHIPPED, OrderStatus.CANCELLED}),
+    OrderStatus.SHIPPED: frozenset({OrderStatus.DELIVERED}),
+    OrderStatus.DELIVERED: frozenset(),
+    OrderStatus.CANCELLED: frozenset(),
+}
+
+# Timestamp column set when an order enters the status
+TIMESTAMP_COLUMNS = {
+    OrderStatus.PAID: "paid_at",
+    OrderStatus.SHIPPED: "shipped_at",
+    OrderStatus.DELIVERED: "delivered_at",
+}
+
+# Notification enqueued for each order entering the status
+STATUS_EVENTS = {
+    OrderStatus.SHIPPED: "ORDER_SHIPPED",
+}
+
+CHUNK_SIZE = 1000  # Ids per statement, well under bind-parameter limits
+
+
+def can_transition(current: OrderStatus, target: OrderStatus) -> bool:
+    return target in TRANSITIONS[current]
+
+
+def sources_for(target: OrderStatus) -> List[OrderStatus]:
+    """Statuses an order may be in to move to target"""
+    return [status for status, targets in TRANSITIONS.items() if target in targets]
+
+
+def _chunks(values: List, size: int = CHUNK_SIZE) -> Iterable[List]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def transition_orders(db: Session, order_ids: Iterable[int], target: OrderStatus) -> List[int]:
+    """
+    Move orders to target where the transition is allowed (caller commits).
+    Returns the ids that changed; missing orders and disallowed transitions
+    are left untouched.
+    """
+    sources = sources_for(target)
+    if not sources:
+        return []
+
+    now = datetime.utcnow()
+    values = {"status": target, "updated_at": now}
+    if target in TIMESTAMP_COLUMNS:
+        values[TIMESTAMP_COLUMNS[target]] = now
+
+    changed = []
+    for chunk in _chunks(list(dict.fromkeys(order_ids))):
+        changed.extend(db.execute(
+            update(Order)
+            .where(Order.id.in_(chunk), Order.status.in_(sources))
+            .values(**values)
+            .returning(Order.id, Order.order_number, Order.user_id)
+            .execution_options(synchronize_session=False)
+        ).all())
+
+    event_type = STATUS_EVENTS.get(target)
+    if event_type and changed:
+        emails = {}
+        for chunk in _chunks(list({row.user_id for row in changed})):
+            emails.update(db.query(User.id, User.email).filter(User.id.in_(chunk)).all())
+        enqueue_events(db, event_type, [
+            {"order_id": row.id, "order_number": row.order_number, "user_email": emails.get(row.user_id)}
+            for row in changed
+        ])
+
+    return [row.id for row in changed]
@@ -0,0 +1,248 @@
+"""Transactional outbox for notification events
+
+Routes call ``enqueue_event`` inside the same transaction as the order or
+payment change, so an event exists if and only if the change was committed.
+``OutboxRelay`` runs for the application lifetime, claims due rows in
+batches, posts them to Service C (one request per batch when
+``NOTIFICATIONS_BATCH_URL`` is set, waiting for per-event results) and marks
+each delivered from its own result. Failed sends are retried with exponential
+backoff, which gives at-least-once delivery.
+Delivered rows are purged in batches once older than ``OUTBOX_RETENTION_HOURS``;
+failed rows are kept for inspection.
+"""
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.http_client import http_client
+from app.db.session import SessionLocal
+from app.models.outbox import OutboxEvent, OutboxStatus
+
+
+def enqueue_event(db: Session, event_type: str, data: Dict) -> OutboxEvent:
+    """Add an event to the outbox; it is sent once the caller commits"""
+    event = OutboxEvent(event_type=event_type, payload=json.dumps(data, default=str))
+    db.add(event)
+    return event
+
+
+def enqueue_events(db: Session, event_type: str, items: List[Dict]) -> None:
+    """Add several events of one type with a single INSERT; sent once the caller commits"""
+    if items:
+        db.execute(insert(OutboxEvent), [
+            {"event_type": event_type, "payload": json.dumps(data, default=str)} for data in items
+        ])
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff (seconds) after the given number of failed attempts"""
+    return min(settings.OUTBOX_BACKOFF_BASE * (2 ** (attempts - 1)), settings.OUTBOX_BACKOFF_MAX)
+
+
+class OutboxRelay:
+    """Background worker that delivers outbox events to the notifications service"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.delivered = 0
+        self.failed_attempts = 0
+        self.last_lag_seconds = 0.0
+        self.purged = 0
+        self._next_purge_at = 0.0
+
+    def start(self) -> None:
+        if self._task is None and settings.OUTBOX_RELAY_ENABLED:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Finish the current batch and stop polling"""
+        if self._task is None:
+            return
+        self._stopping = True
+        try:
+            await asyncio.wait_for(self._task, timeout=settings.HTTP_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                sent = await self.run_once()
+            except Exception as e:
+                print(f"Outbox relay error: {e}")
+                sent = 0
+            if settings.OUTBOX_RETENTION_HOURS > 0 and time.monotonic() >= self._next_purge_at:
+                self._next_purge_at = time.monotonic() + settings.OUTBOX_PURGE_INTERVAL
+                try:
+                    await asyncio.to_thread(self.purge_delivered)
+                except Exception as e:
+                    print(f"Outbox purge error: {e}")
+            # Drain a backlog without sleeping; otherwise poll
+            if sent < settings.OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL)
+
+    async def run_once(self) -> int:
+        """Claim, send and settle one batch of due events"""
+        batch = await asyncio.to_thread(self._claim_batch)
+        if not batch:
+            return 0
+
+        if settings.NOTIFICATIONS_BATCH_URL:
+            results = await self._send_batch([(event_type, payload) for _, event_type, payload, _ in batch])
+        else:
+            results = await asyncio.gather(*(self._send(event_type, payload) for _, event_type, payload, _ in batch))
+        outcomes = [(event_id, error) for (event_id, _, _, _), error in zip(batch, results)]
+        await asyncio.to_thread(self._settle, outcomes)
+
+        now = datetime.utcnow()
+        for (_, _, _, created_at), error in zip(batch, results):
+            if error is None and created_at is not None:
+                self.last_lag_seconds = (now - created_at).total_seconds()
+        return len(batch)
+
+    def _claim_batch(self) -> List[Tuple[int, str, str, Optional[datetime]]]:
+        """Lease due rows so concurrent relays do not send them twice"""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            events = db.query(OutboxEvent).filter(
+                OutboxEvent.status == OutboxStatus.PENDING,
+                OutboxEvent.next_attempt_at <= now
+            ).order_by(OutboxEvent.id).limit(settings.OUTBOX_BATCH_SIZE).with_for_update(skip_locked=True).all()
+
+            lease_until = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+            batch = []
+            for event in events:
+                event.next_attempt_at = lease_until
+                batch.append((event.id, event.event_type, event.payload, event.created_at))
+            db.commit()
+            return batch
+        finally:
+            db.close()
+
+    async def _send(self, event_type: str, payload: str) -> Optional[str]:
+        """Post one event; returns an error message or None on success"""
+        try:
+            response = await http_client.post(
+                settings.NOTIFICATIONS_URL,
+                json={"type": event_type, "data": json.loads(payload)},
+                timeout=settings.NOTIFICATIONS_TIMEOUT,
+                target="notifications"
+            )
+            response.raise_for_status()
+            return None
+        except Exception as e:
+            return str(e) or e.__class__.__name__
+
+    async def _send_batch(self, events: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """Post a whole batch in one request; returns an error message or None per event
+
+        Sent with wait=true so Service C handles the events before replying; a
+        202 from its in-memory queue would not survive a restart.
+        """
+        try:
+            response = await http_client.post(
+                settings.NOTIFICATIONS_BATCH_URL,
+                params={"wait": "true"},
+                json=[{"type": event_type, "data": json.loads(payload)} for event_type, payload in events],
+                timeout=settings.NOTIFICATIONS_TIMEOUT,
+                target="notifications"
+            )
+            response.raise_for_status()
+            results = response.json().get("results")
+            if not isinstance(results, list) or len(results) != len(events):
+                raise ValueError("Batch response did not include one result per event")
+        except Exception as e:
+            return [str(e) or e.__class__.__name__] * len(events)
+        return [
+            None if isinstance(result, dict) and result.get("ok")
+            else (isinstance(result, dict) and result.get("error")) or "Notification failed"
+            for result in results
+        ]
+
+    def _settle(self, outcomes: List[Tuple[int, Optional[str]]]) -> None:
+        """Mark sent events delivered and schedule retries for failures"""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            delivered_ids = [event_id for event_id, error in outcomes if error is None]
+            if delivered_ids:
+                db.query(OutboxEvent).filter(OutboxEvent.id.in_(delivered_ids)).update(
+                    {"status": OutboxStatus.DELIVERED, "delivered_at": now},
+                    synchronize_session=False
+                )
+                self.delivered += len(delivered_ids)
+
+            errors = {event_id: error for event_id, error in outcomes if error is not None}
+            if errors:
+                for event in db.query(OutboxEvent).filter(OutboxEvent.id.in_(list(errors))).all():
+                    event.attempts += 1
+                    event.last_error = errors[event.id]
+                    if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                        event.status = OutboxStatus.FAILED
+                        print(f"Outbox event {event.id} ({event.event_type}) failed permanently: {event.last_error}")
+                    else:
+                        event.next_attempt_at = now + timedelta(seconds=backoff_delay(event.attempts))
+                self.failed_attempts += len(errors)
+
+            db.commit()
+        finally:
+            db.close()
+
+    def purge_delivered(self) -> int:
+        """Delete delivered rows past the retention window, one short transaction per batch"""
+        cutoff = datetime.utcnow() - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+        purged = 0
+        db = SessionLocal()
+        try:
+            while not self._stopping:
+                ids = [event_id for (event_id,) in db.query(OutboxEvent.id).filter(
+                    OutboxEvent.status == OutboxStatus.DELIVERED,
+                    OutboxEvent.delivered_at < cutoff
+                ).limit(settings.OUTBOX_PURGE_BATCH_SIZE).all()]
+                if not ids:
+                    break
+                db.query(OutboxEvent).filter(OutboxEvent.id.in_(ids)).delete(synchronize_session=False)
+                db.commit()
+                purged += len(ids)
+                if len(ids) < settings.OUTBOX_PURGE_BATCH_SIZE:
+                    break
+        finally:
+            db.close()
+        self.purged += purged
+        return purged
+
+    def stats(self) -> Dict:
+        """In-process delivery counters (no database access, safe for liveness probes)"""
+        return {
+            "delivered": self.delivered,
+            "failed_attempts": self.failed_attempts,
+            "last_lag_seconds": self.last_lag_seconds,
+            "purged": self.purged,
+        }
+
+    def backlog(self) -> Dict:
+        """Pending events and the age of the oldest, read from the database"""
+        db = SessionLocal()
+        try:
+            pending, oldest = db.query(
+                func.count(OutboxEvent.id), func.min(OutboxEvent.created_at)
+            ).filter(OutboxEvent.status == OutboxStatus.PENDING).one()
+        finally:
+            db.close()
+        return {
+            "pending": pending,
+            "oldest_pending_age_seconds": (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0,
+        }
+
+
+outbox_relay = OutboxRelay()
@@ -0,0 +1,280 @@
+"""Async payment gateway
+
+Checkout calls ``payment_gateway`` instead of the Stripe SDK. ``StripeGateway``
+runs the blocking SDK on its own thread pool (``PAYMENT_GATEWAY_WORKERS``), so
+a slow Stripe neither blocks the event loop nor ties up the threadpool shared
+by sync routes. Every attempt is bounded by ``STRIPE_TIMEOUT``. Transient
+failures (connection errors, timeouts, 429, 5xx) are retried with jittered
+backoff, but only for calls that are safe to repeat: retrieves, and creates
+that carry an idempotency key. After ``PAYMENT_CIRCUIT_FAILURE_THRESHOLD``
+consecutive failed calls the circuit opens and calls fail fast for
+``PAYMENT_CIRCUIT_RESET_SECONDS``; then a single probe decides whether it closes.
+
+``FakePaymentGateway`` (``PAYMENT_GATEWAY=fake``) keeps intents in memory and
+answers after ``FAKE_PAYMENT_LATENCY_MS``, for local runs, tests and benchmarks.
+"""
+import asyncio
+import random
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import stripe
+
+from app.core.config import settings
+from app.core.metrics import registry, track_outbound
+
+circuit_open = registry.gauge(
+    "payment_gateway_circuit_open", "1 while the payment gateway circuit breaker is open", ("gateway",)
+)
+gateway_retries = registry.counter(
+    "payment_gateway_retries_total", "Payment gateway calls retried after a transient failure", ("gateway", "operation")
+)
+
+
+class PaymentGatewayError(Exception):
+    """The payment provider rejected or failed the request"""
+
+
+class PaymentGatewayUnavailable(PaymentGatewayError):
+    """The payment provider timed out, kept failing, or the circuit is open"""
+
+
+class PaymentIntent:
+    """Provider-independent view of a payment intent"""
+
+    def __init__(self, id: str, client_secret: Optional[str], status: str, amount: int, metadata: Optional[Dict] = None):
+        self.id = id
+        self.client_secret = client_secret
+        self.status = status
+        self.amount = amount  # Smallest currency unit (cents)
+        self.metadata = metadata or {}
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self._opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            # A probe that never reported back (e.g. cancelled) is replaced after another period
+            now = time.monotonic()
+            if state == "half_open" and (self._probe_started is None or now - self._probe_started >= self.reset_seconds):
+                self._probe_started = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                circuit_open.dec((self.name,))
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is not None:
+                # Failed probe: stay open for another period
+                self._opened_at = time.monotonic()
+                self._probe_started = None
+            elif self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                circuit_open.inc((self.name,))
+                print(f"Payment gateway circuit opened after {self._failures} consecutive failures")
+
+
+class PaymentGateway(ABC):
+    """Base class for payment gateways"""
+
+    name = "base"
+
+    def start(self) -> None:
+        """Acquire resources (idempotent)"""
+
+    def shutdown(self) -> None:
+        """Release resources"""
+
+    @abstractmethod
+    async def create_payment_intent(
+        self, amount: float, currency: str = "usd", metadata: Optional[Dict] = None, idempotency_key: Optional[str] = None
+    ) -> PaymentIntent:
+        """Create an intent for ``amount`` (in major units)"""
+
+    @abstractmethod
+    async def retrieve_payment_intent(self, payment_intent_id: str) -> PaymentIntent:
+        """Fetch the current state of an intent"""
+
+
+def _from_stripe(intent) -> PaymentIntent:
+    return PaymentIntent(
+        id=intent.id,
+        client_secret=intent.client_secret,
+        status=intent.status,
+        amount=intent.amount,
+        metadata=dict(intent.metadata or {})
+    )
+
+
+class StripeGateway(PaymentGateway):
+    """Stripe SDK on a dedicated thread pool with timeouts, retries and a circuit breaker"""
+
+    name = "stripe"
+
+    TRANSIENT_ERRORS = (stripe.error.APIConnectionError, stripe.error.RateLimitError, stripe.error.APIError)
+
+    def __init__(self, api_key: str, timeout: float, max_retries: int, retry_backoff: float, workers: int,
+                 breaker: CircuitBreaker):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.workers = workers
+        self.breaker = breaker
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        stripe.api_key = api_key
+        stripe.max_network_retries = 0  # Retried here, where the circuit breaker sees them
+        stripe.default_http_client = stripe.RequestsClient(timeout=timeout)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stripe")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    async def _call(self, operation: str, retryable: bool, fn, *args, **kwargs):
+        if not self.breaker.allow():
+            raise PaymentGatewayUnavailable("Payment provider unavailable (circuit open)")
+        self.start()
+
+        attempt = 0
+        while True:
+            try:
+                with track_outbound("stripe", operation):
+                    # The SDK's own timeout frees the worker thread shortly after this one fires
+                    result = await asyncio.wait_for(
+                        asyncio.wrap_future(self._executor.submit(fn, *args, **kwargs)), timeout=self.timeout
+                    )
+                self.breaker.record_success()
+                return result
+            except (asyncio.TimeoutError, *self.TRANSIENT_ERRORS) as e:
+                if retryable and attempt < self.max_retries:
+                    attempt += 1
+                    gateway_retries.inc((self.name, operation))
+                    await asyncio.sleep(random.uniform(0, self.retry_backoff * (2 ** attempt)))
+                    continue
+                self.breaker.record_failure()
+                raise PaymentGatewayUnavailable(f"Stripe error: {str(e) or e.__class__.__name__}") from e
+            except stripe.error.StripeError as e:
+                # Rejected requests (card errors, bad parameters) say nothing about Stripe's health
+                self.breaker.record_success()
+                raise PaymentGatewayError(f"Stripe error: {str(e)}") from e
+
+    async def create_payment_intent(self, amount, currency="usd", metadata=None, idempotency_key=None):
+        """Create a Stripe payment intent (retried only with an idempotency key)"""
+        intent = await self._call(
+            "create_payment_intent",
+            idempotency_key is not None,
+            stripe.PaymentIntent.create,
+            amount=int(round(amount * 100)),  # Convert to cents
+            currency=currency,
+            metadata=metadata or {},
+            automatic_payment_methods={"enabled": True},
+            idempotency_key=idempotency_key,
+        )
+        return _from_stripe(intent)
+
+    async def retrieve_payment_intent(self, payment_intent_id):
+        """Retrieve a payment intent"""
+        intent = await self._call("retrieve_payment_intent", True, stripe.PaymentIntent.retrieve, payment_intent_id)
+        return _from_stripe(intent)
+
+
+class FakePaymentGateway(PaymentGateway):
+    """In-process stand-in for Stripe with configurable latency"""
+
+    name = "fake"
+
+    def __init__(self, latency_seconds: float = 0.0, status: str = "succeeded"):
+        self.latency_seconds = latency_seconds
+        self.status = status  # Status given to new intents
+        self.intents: Dict[str, PaymentIntent] = {}
+        self._by_idempotency_key: Dict[str, str] = {}
+
+    async def create_payment_intent(self, amount, currency="usd", metadata=None, idempotency_key=None):
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        if idempotency_key in self._by_idempotency_key:
+            return self.intents[self._by_idempotency_key[idempotency_key]]
+
+        intent_id = f"pi_fake_{uuid.uuid4().hex[:24]}"
+        intent = PaymentIntent(
+            id=intent_id,
+            client_secret=f"{intent_id}_secret_{uuid.uuid4().hex[:16]}",
+            status=self.status,
+            amount=int(round(amount * 100)),
+            metadata={key: str(value) for key, value in (metadata or {}).items()}
+        )
+        self.intents[intent_id] = intent
+        if idempotency_key is not None:
+            self._by_idempotency_key[idempotency_key] = intent_id
+        return intent
+
+    async def retrieve_payment_intent(self, payment_intent_id):
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        intent = self.intents.get(payment_intent_id)
+        if intent is None:
+            raise PaymentGatewayError(f"Stripe error: No such payment_intent: '{payment_intent_id}'")
+        return intent
+
+    def set_status(self, payment_intent_id: str, status: str) -> None:
+        """Simulate the customer completing (or failing) a payment"""
+        self.intents[payment_intent_id].status = status
+
+
+def build_payment_gateway() -> PaymentGateway:
+    if settings.PAYMENT_GATEWAY == "fake":
+        return FakePaymentGateway(latency_seconds=settings.FAKE_PAYMENT_LATENCY_MS / 1000)
+    return StripeGateway(
+        api_key=settings.STRIPE_SECRET_KEY,
+        timeout=settings.STRIPE_TIMEOUT,
+        max_retries=settings.STRIPE_MAX_RETRIES,
+        retry_backoff=settings.STRIPE_RETRY_BACKOFF,
+        workers=settings.PAYMENT_GATEWAY_WORKERS,
+        breaker=CircuitBreaker(
+            "stripe",
+            failure_threshold=settings.PAYMENT_CIRCUIT_FAILURE_THRESHOLD,
+            reset_seconds=settings.PAYMENT_CIRCUIT_RESET_SECONDS
+        )
+    )
+
+
+payment_gateway = build_payment_gateway()
@@ -0,0 +1,277 @@
+"""Stripe webhook ingestion and processing
+
+``store_event`` persists a verified event under its Stripe event id. A
+redelivered event hits the unique constraint and is dropped, so the webhook
+route can acknowledge right away. ``WebhookProcessor`` runs for the
+application lifetime and applies pending events in batches with set-based
+updates, so the statement count per batch does not grow with its size. Rows
+are claimed with SKIP LOCKED, so several replicas can run it.
+
+Payment state only moves forward: ``succeeded`` wins over ``payment_failed``
+in whatever order they arrive, and an order is marked paid (and ORDER_PAID
+enqueued) only on its ``created`` -> ``paid`` transition. An event that
+arrives before its payment row exists (the webhook can beat the checkout
+commit) is retried with a growing delay.
+
+Processed and failed rows are only needed to drop Stripe redeliveries, so they
+are purged in batches once older than ``WEBHOOK_RETENTION_DAYS``.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.session import SessionLocal
+from app.models.order import Order, OrderStatus
+from app.models.payment import Payment, PaymentStatus
+from app.models.user import User
+from app.models.webhook import WebhookEvent, WebhookStatus
+from app.services.outbox import enqueue_events
+
+SUCCEEDED = "payment_intent.succeeded"
+FAILED = "payment_intent.payment_failed"
+HANDLED_EVENT_TYPES = (SUCCEEDED, FAILED)
+
+webhook_events = registry.counter(
+    "webhook_events_total", "Stripe webhook events by outcome (stored, duplicate, ignored, processed, failed)", ("outcome",)
+)
+
+_INSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def store_event(db: Session, event: Dict, payload: str) -> bool:
+    """Persist a verified event (commits); returns False if it was already stored"""
+    values = {
+        "stripe_event_id": event["id"],
+        "event_type": event["type"],
+        "payment_intent_id": event["data"]["object"].get("id"),
+        "stripe_created_at": datetime.utcfromtimestamp(event["created"]) if event.get("created") else None,
+        "payload": payload,
+        "status": WebhookStatus.PENDING,
+        "next_attempt_at": datetime.utcnow(),
+        "received_at": datetime.utcnow(),
+    }
+
+    insert = _INSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        result = db.execute(
+            insert(WebhookEvent).values(**values).on_conflict_do_nothing(index_elements=[WebhookEvent.stripe_event_id])
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    db.add(WebhookEvent(**values))
+    try:
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+class WebhookProcessor:
+    """Background worker that applies stored webhook events to payments and orders"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.processed = 0
+        self.failed = 0
+        self.last_lag_seconds = 0.0
+        self.purged = 0
+        self._next_purge_at = 0.0
+
+    def start(self) -> None:
+        if self._task is None and settings.WEBHOOK_WORKER_ENABLED:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def notify(self) -> None:
+        """New events were stored; process them without waiting for the next poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Finish the current batch and stop polling"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self.notify()
+        try:
+            await asyncio.wait_for(self._task, timeout=settings.HTTP_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                handled = await self.run_once()
+            except Exception as e:
+                print(f"Webhook processor error: {e}")
+                handled = 0
+            if settings.WEBHOOK_RETENTION_DAYS > 0 and time.monotonic() >= self._next_purge_at:
+                self._next_purge_at = time.monotonic() + settings.WEBHOOK_PURGE_INTERVAL
+                try:
+                    await asyncio.to_thread(self.purge_settled)
+                except Exception as e:
+                    print(f"Webhook purge error: {e}")
+            # Drain a backlog without sleeping; otherwise wait for new events or the next poll
+            if handled < settings.WEBHOOK_BATCH_SIZE and not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.WEBHOOK_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def run_once(self) -> int:
+        """Apply one batch of due events"""
+        return await asyncio.to_thread(self._process_batch)
+
+    def _process_batch(self) -> int:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            events = db.query(WebhookEvent).filter(
+                WebhookEvent.status == WebhookStatus.PENDING,
+                WebhookEvent.next_attempt_at <= now
+            ).order_by(WebhookEvent.id).limit(settings.WEBHOOK_BATCH_SIZE).with_for_update(skip_locked=True).all()
+            if not events:
+                return 0
+
+            intent_ids = {event.payment_intent_id for event in events if event.payment_intent_id}
+            order_ids = dict(db.query(Payment.stripe_payment_intent_id, Payment.order_id).filter(
+                Payment.stripe_payment_intent_id.in_(intent_ids)
+            ).all()) if intent_ids else {}
+
+            succeeded, failed, done = set(), set(), []
+            for event in events:
+                if event.payment_intent_id not in order_ids:
+                    self._retry_later(event, now, "Payment not found")
+                    continue
+                (succeeded if event.event_type == SUCCEEDED else failed).add(event.payment_intent_id)
+                done.append(event.id)
+
+            # A failure never overrides a success, whichever was delivered first
+            if failed:
+                db.execute(
+                    update(Payment)
+                    .where(Payment.stripe_payment_intent_id.in_(failed), Payment.status == PaymentStatus.PENDING)
+                    .values(status=PaymentStatus.FAILED)
+                    .execution_options(synchronize_session=False)
+                )
+            if succeeded:
+                db.execute(
+                    update(Payment)
+                    .where(Payment.stripe_payment_intent_id.in_(succeeded), Payment.status != PaymentStatus.COMPLETED)
+                    .values(status=PaymentStatus.COMPLETED)
+                    .execution_options(synchronize_session=False)
+                )
+                self._mark_orders_paid(db, {order_ids[intent_id] for intent_id in succeeded}, now)
+
+            done_ids = set(done)
+            received = [event.received_at for event in events if event.id in done_ids and event.received_at]
+            if done:
+                db.execute(
+                    update(WebhookEvent)
+                    .where(WebhookEvent.id.in_(done))
+                    .values(status=WebhookStatus.PROCESSED, processed_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+            db.commit()
+
+            self.processed += len(done)
+            webhook_events.inc(("processed",), len(done))
+            if received:
+                self.last_lag_seconds = (datetime.utcnow() - min(received)).total_seconds()
+            return len(events)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _retry_later(self, event: WebhookEvent, now: datetime, error: str) -> None:
+        event.attempts += 1
+        event.last_error = error
+        if event.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            event.status = WebhookStatus.FAILED
+            self.failed += 1
+            webhook_events.inc(("failed",))
+            print(f"Webhook event {event.stripe_event_id} ({event.event_type}) failed permanently: {error}")
+        else:
+            event.next_attempt_at = now + timedelta(seconds=settings.WEBHOOK_RETRY_DELAY * event.attempts)
+
+    def _mark_orders_paid(self, db: Session, order_ids, now: datetime) -> None:
+        """created -> paid in one statement; only orders that actually transitioned are notified"""
+        paid = db.execute(
+            update(Order)
+            .where(Order.id.in_(order_ids), Order.status == OrderStatus.CREATED)
+            .values(status=OrderStatus.PAID, paid_at=now)
+            .execution_options(synchronize_session=False)
+            .returning(Order.id, Order.order_number, Order.user_id)
+        ).all()
+        if not paid:
+            return
+
+        emails = dict(db.query(User.id, User.email).filter(User.id.in_({row.user_id for row in paid})).all())
+        enqueue_events(db, "ORDER_PAID", [
+            {"order_id": row.id, "order_number": row.order_number, "user_email": emails.get(row.user_id)}
+            for row in paid
+        ])
+
+    def purge_settled(self) -> int:
+        """Delete processed and failed rows past the retention window, one short transaction per batch"""
+        cutoff = datetime.utcnow() - timedelta(days=settings.WEBHOOK_RETENTION_DAYS)
+        purged = 0
+        db = SessionLocal()
+        try:
+            while not self._stopping:
+                ids = [event_id for (event_id,) in db.query(WebhookEvent.id).filter(
+                    WebhookEvent.status.in_([WebhookStatus.PROCESSED, WebhookStatus.FAILED]),
+                    WebhookEvent.received_at < cutoff
+                ).limit(settings.WEBHOOK_PURGE_BATCH_SIZE).all()]
+                if not ids:
+                    break
+                db.query(WebhookEvent).filter(WebhookEvent.id.in_(ids)).delete(synchronize_session=False)
+                db.commit()
+                purged += len(ids)
+                if len(ids) < settings.WEBHOOK_PURGE_BATCH_SIZE:
+                    break
+        finally:
+            db.close()
+        self.purged += purged
+        return purged
+
+    def stats(self) -> Dict:
+        """In-process processing counters (no database access, safe for liveness probes)"""
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "last_lag_seconds": self.last_lag_seconds,
+            "purged": self.purged,
+        }
+
+    def backlog(self) -> Dict:
+        """Events still waiting to be applied, read from the database"""
+        db = SessionLocal()
+        try:
+            pending = db.query(WebhookEvent).filter(WebhookEvent.status == WebhookStatus.PENDING).count()
+        finally:
+            db.close()
+        return {"pending": pending}
+
+
+webhook_processor = WebhookProcessor()
@@ -1,44 +1,122 @@
 """Catalog routes"""
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import or_
-from typing import List, Optional
+from typing import Dict, List, Optional
+from pydantic import TypeAdapter
 
-from app.core.deps import get_db
+from app.core.cache import catalog_cache
+from app.core.config import settings
+from app.core.http_cache import conditional_response
+from app.core.deps import get_async_db, get_db
+from app.db.runner import DbRunner
+from app.core.pagination import (
+    ID_CURSOR, MAX_PAGE_SIZE, OFFSET_CURSOR, decode_cursor, encode_cursor, set_next_cursor
+)
 from app.models import Category, Product, ProductImage, Variant, Inventory
+from app.services.ratings import get_rating_summaries
+from app.services.search import get_search_backend
 from app.schemas.catalog import (
     CategoryResponse, CategoryCreate,
-    ProductResponse, ProductCreate, ProductUpdate, ProductListResponse
+    ProductResponse, ProductDetailResponse, ProductCreate, ProductUpdate, ProductListResponse,
+    VariantBatchRequest, VariantPriceResponse
 )
 
 router = APIRouter(prefix="/catalog", tags=["catalog"])
 
 
+def get_primary_images(db: Session, product_ids: List[int]) -> Dict[int, str]:
+    """Resolve primary image URLs for a page of products in a single query"""
+    if not product_ids:
+        return {}
+    
+    rows = db.query(ProductImage.product_id, ProductImage.url).filter(
+        ProductImage.product_id.in_(product_ids),
+        ProductImage.is_primary == True
+    ).order_by(ProductImage.product_id, ProductImage.display_order, ProductImage.id).all()
+    
+    # Keep the first primary image per product (lowest display_order)
+    images: Dict[int, str] = {}
+    for product_id, url in rows:
+        images.setdefault(product_id, url)
+    return images
+
+
+def build_product_list(db: Session, products: List[Product]) -> List[ProductListResponse]:
+    """Build list responses for a page of products with batched primary images and ratings"""
+    product_ids = [product.id for product in products]
+    images = get_primary_images(db, product_ids)
+    ratings = get_rating_summaries(db, product_ids)
+    
+    return [
+        ProductListResponse(
+            id=product.id,
+            name=product.name,
+            slug=product.slug,
+            base_price=product.base_price,
+            featured=product.featured,
+            category_id=product.category_id,
+            primary_image=images.get(product.id),
+            review_count=ratings[product.id].review_count if product.id in ratings else 0,
+            average_rating=ratings[product.id].average_rating if product.id in ratings else None
+        )
+        for product in products
+    ]
+
+
+CATEGORY_LIST = TypeAdapter(List[CategoryResponse])
+PRODUCT_LIST = TypeAdapter(List[ProductListResponse])
+
+
+def load_product_detail(db: Session, product_id: int) -> Optional[Product]:
+    """Product with rating, images, variants and inventory in three queries, however many variants it has"""
+    return db.query(Product).options(
+        joinedload(Product.rating),
+        selectinload(Product.images),
+        selectinload(Product.variants).joinedload(Variant.inventory)
+    ).filter(Product.id == product_id).first()
+
+
+def build_product_detail(product: Product) -> ProductDetailResponse:
+    """Detail response with available quantity per variant (0 without an inventory row)"""
+    detail = ProductDetailResponse.model_validate(product)
+    for variant_response, variant in zip(detail.variants, product.variants):
+        variant_response.available_quantity = variant.inventory.available if variant.inventory else 0
+    return detail
+
+
 @router.get("/categories", response_model=List[CategoryResponse])
-def list_categories(db: Session = Depends(get_db)):
+def list_categories(request: Request, db: Session = Depends(get_db)):
     """Get all categories"""
-    categories = db.query(Category).all()
-    return categories
+    def load() -> bytes:
+        return CATEGORY_LIST.dump_json(CATEGORY_LIST.validate_python(db.query(Category).all()))
+    
+    payload = catalog_cache.get_or_load("categories", load)
+    return conditional_response(request, payload, settings.CACHE_CONTROL_CATEGORIES)
 
 
 @router.get("/categories/{category_id}", response_model=CategoryResponse)
-def get_category(category_id: int, db: Session = Depends(get_db)):
+def get_category(category_id: int, request: Request, db: Session = Depends(get_db)):
     """Get category by ID"""
-    category = db.query(Category).filter(Category.id == category_id).first()
-    if not category:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
-    return category
+    def load() -> bytes:
+        category = db.query(Category).filter(Category.id == category_id).first()
+        if not category:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+        return CategoryResponse.model_validate(category).model_dump_json().encode()
+    
+    payload = catalog_cache.get_or_load(f"category:{category_id}", load)
+    return conditional_response(request, payload, settings.CACHE_CONTROL_CATEGORIES)
 
 
-@router.get("/products", response_model=List[ProductListResponse])
-def list_products(
-    category_id: Optional[int] = None,
-    featured: Optional[bool] = None,
-    skip: int = 0,
-    limit: int = 50,
-    db: Session = Depends(get_db)
-):
-    """List products with optional filters"""
+def _list_products(
+    db: Session,
+    response: Response,
+    category_id: Optional[int],
+    featured: Optional[bool],
+    cursor: Optional[str],
+    skip: int,
+    limit: int
+) -> bytes:
     query = db.query(Product).filter(Product.is_active == True)
     
     if category_id:
@@ -47,73 +125,134 @@ def list_products(
     if featured is not None:
         query = query.filter(Product.featured == featured)
     
-    products = query.offset(skip).limit(limit).all()
+    after = decode_cursor(cursor, ID_CURSOR)
+    if after:
+        query = query.filter(Product.id > after["id"])
     
-    # Add primary image
-    result = []
-    for product in products:
-        primary_image = db.query(ProductImage).filter(
-            ProductImage.product_id == product.id,
-            ProductImage.is_primary == True
-        ).first()
-        
-        result.append(ProductListResponse(
-            id=product.id,
-            name=product.name,
-            slug=product.slug,
-            base_price=product.base_price,
-            featured=product.featured,
-            category_id=product.category_id,
-            primary_image=primary_image.url if primary_image else None
-        ))
+    query = query.order_by(Product.id)
+    if skip and not after:
+        # Legacy offset paging; prefer the cursor returned in X-Next-Cursor
+        query = query.offset(skip)
+    
+    products = query.limit(limit + 1).all()
+    
+    if len(products) > limit:
+        products = products[:limit]
+        set_next_cursor(response, encode_cursor(id=products[-1].id))
     
-    return result
+    return PRODUCT_LIST.dump_json(build_product_list(db, products))
 
 
-@router.get("/products/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    """Get product details"""
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    return product
+@router.get("/products", response_model=List[ProductListResponse])
+async def list_products(
+    request: Request,
+    response: Response,
+    category_id: Optional[int] = None,
+    featured: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: DbRunner = Depends(get_async_db)
+):
+    """List products with optional filters (keyset paginated by id)"""
+    payload = await db.run(_list_products, response, category_id, featured, cursor, skip, limit)
+    return conditional_response(
+        request, payload, settings.CACHE_CONTROL_PRODUCTS, headers=dict(response.headers)
+    )
+
+
+@router.get("/products/{product_id}", response_model=ProductDetailResponse)
+def get_product(product_id: int, request: Request, db: Session = Depends(get_db)):
+    """Get product details (available_quantity may lag stock by up to the cache TTL)"""
+    def load() -> bytes:
+        product = load_product_detail(db, product_id)
+        if not product:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        return build_product_detail(product).model_dump_json().encode()
+    
+    payload = catalog_cache.get_or_load(f"product:{product_id}", load)
+    return conditional_response(request, payload, settings.CACHE_CONTROL_PRODUCT_DETAIL)
 
 
 @router.get("/search", response_model=List[ProductListResponse])
 def search_products(
+    response: Response,
     q: str = Query(..., min_length=2),
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db)
 ):
     """Search products by name or description"""
+    after = decode_cursor(cursor, OFFSET_CURSOR, ID_CURSOR) or {}
+    
+    # Ranked backends page by position in the ranking; the SQL path pages by id
+    offset = after.get("offset", skip)
+    try:
+        product_ids = get_search_backend().search(db, q, offset, limit + 1)
+    except Exception as e:
+        print(f"Search backend failed, falling back to SQL: {e}")
+        db.rollback()
+        product_ids = None
+    
+    if product_ids is not None:
+        if len(product_ids) > limit:
+            product_ids = product_ids[:limit]
+            set_next_cursor(response, encode_cursor(offset=offset + limit))
+        
+        products_by_id = {
+            product.id: product
+            for product in db.query(Product).filter(Product.id.in_(product_ids)).all()
+        } if product_ids else {}
+        products = [products_by_id[pid] for pid in product_ids if pid in products_by_id]
+        return build_product_list(db, products)
+    
     search_term = f"%{q}%"
-    products = db.query(Product).filter(
+    query = db.query(Product).filter(
         Product.is_active == True,
         or_(
             Product.name.ilike(search_term),
             Product.description.ilike(search_term)
         )
-    ).offset(skip).limit(limit).all()
-    
-    result = []
-    for product in products:
-        primary_image = db.query(ProductImage).filter(
-            ProductImage.product_id == product.id,
-            ProductImage.is_primary == True
-        ).first()
-        
-        result.append(ProductListResponse(
-            id=product.id,
-            name=product.name,
-            slug=product.slug,
-            base_price=product.base_price,
-            featured=product.featured,
-            category_id=product.category_id,
-            primary_image=primary_image.url if primary_image else None
-        ))
+    )
+    if "id" in after:
+        query = query.filter(Product.id > after["id"])
     
-    return result
+    query = query.order_by(Product.id)
+    if skip and not after:
+        query = query.offset(skip)
+    
+    products = query.limit(limit + 1).all()
+    
+    if len(products) > limit:
+        products = products[:limit]
+        set_next_cursor(response, encode_cursor(id=products[-1].id))
+    
+    return build_product_list(db, products)
+
+
+@router.post("/variants/batch", response_model=List[VariantPriceResponse])
+def get_variants_batch(request: VariantBatchRequest, db: Session = Depends(get_db)):
+    """Resolve price and product name for many SKUs in one call (used by Service A)"""
+    if not request.skus:
+        return []
+    
+    rows = db.query(Variant, Product.name, Product.is_active).join(
+        Product, Product.id == Variant.product_id
+    ).filter(Variant.sku.in_(set(request.skus))).all()
+    
+    return [
+        VariantPriceResponse(
+            sku=variant.sku,
+            variant_id=variant.id,
+            product_id=variant.product_id,
+            product_name=product_name,
+            variant_name=variant.name,
+            price=variant.price,
+            is_active=bool(is_active)
+        )
+        for variant, product_name, is_active in rows
+    ]
 
 
 # Admin endpoints
@@ -124,6 +263,7 @@ def create_category(category_data: CategoryCreate, db: Session = Depends(get_db)
     db.add(new_category)
     db.commit()
     db.refresh(new_category)
+    catalog_cache.invalidate("categories")
     return new_category
 
 
@@ -134,6 +274,8 @@ def create_product(product_data: ProductCreate, db: Session = Depends(get_db)):
     db.add(new_product)
     db.commit()
     db.refresh(new_product)
+    get_search_backend().index_product(new_product)
+    catalog_cache.invalidate(f"product:{new_product.id}")
     return new_product
 
 
@@ -153,6 +295,8 @@ def update_product(
     
     db.commit()
     db.refresh(product)
+    get_search_backend().index_product(product)
+    catalog_cache.invalidate(f"product:{product_id}")
     return product
 
 
@@ -165,4 +309,6 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
     
     db.delete(product)
     db.commit()
+    get_search_backend().remove_product(product_id)
+    catalog_cache.invalidate(f"product:{product_id}")
     return None
@@ -1,11 +1,20 @@
 """Inventory management routes"""
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-import httpx
+from sqlalchemy.exc import IntegrityError
 
-from app.core.deps import get_db
-from app.core.config import settings
+from app.core.deps import get_async_db, get_db
+from app.db.runner import DbRunner
 from app.models import Inventory, Variant
+from app.services.outbox import enqueue_event
+from app.services.reservations import (
+    ReservationError,
+    commit_order,
+    order_has_reservation,
+    order_is_committed,
+    release_order,
+    reserve_items,
+)
 from app.schemas.inventory import (
     InventoryResponse,
     ReserveInventoryRequest,
@@ -17,22 +26,6 @@ from app.schemas.inventory import (
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
 
-async def notify_low_stock(sku: str, quantity: int):
-    """Send low stock notification"""
-    try:
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                settings.NOTIFICATIONS_URL,
-                json={
-                    "type": "LOW_STOCK",
-                    "data": {"sku": sku, "quantity": quantity}
-                },
-                timeout=5.0
-            )
-    except Exception as e:
-        print(f"Failed to send low stock notification: {e}")
-
-
 @router.get("/{sku}", response_model=InventoryResponse)
 def get_inventory(sku: str, db: Session = Depends(get_db)):
     """Get inventory for a SKU"""
@@ -53,42 +46,22 @@ def get_inventory(sku: str, db: Session = Depends(get_db)):
     )
 
 
-@router.post("/reserve", response_model=ReserveInventoryResponse)
-async def reserve_inventory(
-    request: ReserveInventoryRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    """Reserve inventory for an order (two-phase commit)"""
+def _reserve_inventory(db: Session, request: ReserveInventoryRequest) -> ReserveInventoryResponse:
     try:
-        for item in request.items:
-            variant = db.query(Variant).filter(Variant.sku == item.sku).first()
-            if not variant:
-                return ReserveInventoryResponse(
-                    success=False,
-                    message=f"SKU {item.sku} not found"
-                )
-            
-            inventory = db.query(Inventory).filter(Inventory.variant_id == variant.id).first()
-            if not inventory:
-                return ReserveInventoryResponse(
-                    success=False,
-                    message=f"Inventory not found for SKU {item.sku}"
-                )
-            
-            if inventory.available < item.quantity:
-                return ReserveInventoryResponse(
-                    success=False,
-                    message=f"Insufficient stock for SKU {item.sku}. Available: {inventory.available}, Requested: {item.quantity}"
-                )
-            
-            # Reserve the inventory
-            inventory.reserved += item.quantity
-            inventory.available = inventory.quantity - inventory.reserved
-            
-            # Check for low stock
-            if inventory.available <= inventory.low_stock_threshold:
-                background_tasks.add_task(notify_low_stock, item.sku, inventory.available)
+        # Retried reserve calls for the same order are no-ops
+        if order_has_reservation(db, request.order_id):
+            return ReserveInventoryResponse(
+                success=True,
+                reservation_id=request.order_id,
+                message="Inventory already reserved"
+            )
+        
+        reserved = reserve_items(db, request.order_id, request.items)
+        
+        # Check for low stock
+        for line in reserved:
+            if line.available <= line.low_stock_threshold:
+                enqueue_event(db, "LOW_STOCK", {"sku": line.sku, "quantity": line.available})
         
         db.commit()
         
@@ -98,6 +71,19 @@ async def reserve_inventory(
             message="Inventory reserved successfully"
         )
     
+    except ReservationError as e:
+        db.rollback()
+        return ReserveInventoryResponse(success=False, message=str(e))
+    
+    except IntegrityError:
+        # A concurrent call for the same order won the ledger insert
+        db.rollback()
+        return ReserveInventoryResponse(
+            success=True,
+            reservation_id=request.order_id,
+            message="Inventory already reserved"
+        )
+    
     except Exception as e:
         db.rollback()
         return ReserveInventoryResponse(
@@ -106,18 +92,30 @@ async def reserve_inventory(
         )
 
 
+@router.post("/reserve", response_model=ReserveInventoryResponse)
+async def reserve_inventory(
+    request: ReserveInventoryRequest,
+    db: DbRunner = Depends(get_async_db)
+):
+    """Reserve inventory for an order (two-phase commit)"""
+    return await db.run(_reserve_inventory, request)
+
+
 @router.post("/commit", response_model=dict)
 def commit_inventory(request: CommitInventoryRequest, db: Session = Depends(get_db)):
     """Commit reserved inventory (finalize the reservation)"""
-    # In this implementation, commit means the reservation is finalized
-    # The actual quantity reduction happened during reserve
-    return {"success": True, "message": "Inventory committed", "order_id": request.order_id}
+    lines = commit_order(db, request.order_id)
+    db.commit()
+    
+    if lines == 0 and not order_is_committed(db, request.order_id):
+        return {"success": False, "message": "No active reservation for order", "order_id": request.order_id}
+    
+    return {"success": True, "message": "Inventory committed", "order_id": request.order_id, "lines": lines}
 
 
 @router.post("/release", response_model=dict)
 def release_inventory(request: ReleaseInventoryRequest, db: Session = Depends(get_db)):
     """Release reserved inventory (cancel reservation)"""
-    # This would need to track which SKUs were reserved for this order
-    # For simplicity, we're returning success
-    # In production, you'd need a reservation tracking table
-    return {"success": True, "message": "Inventory released", "order_id": request.order_id}
+    lines = release_order(db, request.order_id)
+    db.commit()
+    return {"success": True, "message": "Inventory released", "order_id": request.order_id, "lines": lines}
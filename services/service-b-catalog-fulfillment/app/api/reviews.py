@@ -1,20 +1,57 @@
 """Review routes"""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import and_, or_
+from typing import List, Optional
+from pydantic import TypeAdapter
 
+from app.core.cache import catalog_cache
+from app.core.config import settings
 from app.core.deps import get_db
+from app.core.http_cache import conditional_response
+from app.core.pagination import CREATED_AT_CURSOR, MAX_PAGE_SIZE, decode_cursor, encode_cursor, set_next_cursor
 from app.models import Review, Product
 from app.schemas.review import ReviewCreate, ReviewResponse
+from app.services.ratings import record_rating
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
+REVIEW_LIST = TypeAdapter(List[ReviewResponse])
+
 
 @router.get("/product/{product_id}", response_model=List[ReviewResponse])
-def get_product_reviews(product_id: int, db: Session = Depends(get_db)):
-    """Get all reviews for a product"""
-    reviews = db.query(Review).filter(Review.product_id == product_id).order_by(Review.created_at.desc()).all()
-    return reviews
+def get_product_reviews(
+    product_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    """Get reviews for a product, newest first (keyset paginated)"""
+    query = db.query(Review).filter(Review.product_id == product_id)
+    
+    after = decode_cursor(cursor, CREATED_AT_CURSOR)
+    if after:
+        query = query.filter(or_(
+            Review.created_at < after["created_at"],
+            and_(Review.created_at == after["created_at"], Review.id < after["id"])
+        ))
+    
+    reviews = query.order_by(Review.created_at.desc(), Review.id.desc()).limit(limit + 1).all()
+    
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        set_next_cursor(response, encode_cursor(created_at=reviews[-1].created_at, id=reviews[-1].id))
+    
+    # Reviews are append-only, so the newest one on the page dates the page
+    return conditional_response(
+        request,
+        REVIEW_LIST.dump_json(REVIEW_LIST.validate_python(reviews)),
+        settings.CACHE_CONTROL_REVIEWS,
+        last_modified=reviews[0].created_at if reviews else None,
+        headers=dict(response.headers)
+    )
 
 
 @router.post("", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
@@ -44,6 +81,10 @@ def create_review(review_data: ReviewCreate, user_id: int, db: Session = Depends
         verified_purchase=0  # Should verify with Service A
     )
     db.add(new_review)
+    record_rating(db, review_data.product_id, review_data.rating)
     db.commit()
     db.refresh(new_review)
+    
+    # Detail and list responses embed the rating summary
+    catalog_cache.invalidate(f"product:{review_data.product_id}")
     return new_review
@@ -1,67 +1,64 @@
 """Store location routes"""
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-import math
+from typing import List, Optional
+from pydantic import TypeAdapter
 
+from app.core.config import settings
 from app.core.deps import get_db
+from app.core.http_cache import conditional_response
 from app.models import Store
 from app.schemas.store import StoreResponse
+from app.services.store_locator import get_store_locator
 
 router = APIRouter(prefix="/stores", tags=["stores"])
 
-
-def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Calculate distance between two points using Haversine formula (in km)"""
-    R = 6371  # Earth's radius in kilometers
-    
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-    
-    a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    
-    return R * c
+STORE_LIST = TypeAdapter(List[StoreResponse])
 
 
 @router.get("/nearby", response_model=List[StoreResponse])
 def get_nearby_stores(
-    lat: float = Query(..., description="Latitude"),
-    lng: float = Query(..., description="Longitude"),
-    radius_km: float = Query(50, description="Search radius in kilometers"),
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude"),
+    radius_km: float = Query(50, gt=0, description="Search radius in kilometers"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.STORES_NEARBY_MAX_LIMIT, description="Return only the k nearest"),
     db: Session = Depends(get_db)
 ):
-    """Get stores within radius of given coordinates"""
-    stores = db.query(Store).filter(Store.is_active == True).all()
+    """Get stores within radius of given coordinates, nearest first"""
+    matches = get_store_locator().nearby(db, lat, lng, radius_km, limit)
     
-    nearby_stores = []
-    for store in stores:
-        distance = calculate_distance(lat, lng, store.latitude, store.longitude)
-        if distance <= radius_km:
-            store_response = StoreResponse.model_validate(store)
-            store_response.distance_km = round(distance, 2)
-            nearby_stores.append(store_response)
+    store_ids = [store_id for store_id, _ in matches]
+    stores = {
+        store.id: store
+        for store in db.query(Store).filter(Store.id.in_(store_ids), Store.is_active == True).all()
+    } if store_ids else {}
     
-    # Sort by distance
-    nearby_stores.sort(key=lambda x: x.distance_km)
+    nearby_stores = []
+    for store_id, distance in matches:
+        store = stores.get(store_id)
+        if store is None:
+            # Deactivated or deleted since the index was built
+            continue
+        store_response = StoreResponse.model_validate(store)
+        store_response.distance_km = round(distance, 2)
+        nearby_stores.append(store_response)
     
-    return nearby_stores
+    return conditional_response(request, STORE_LIST.dump_json(nearby_stores), settings.CACHE_CONTROL_STORES)
 
 
 @router.get("", response_model=List[StoreResponse])
-def list_stores(db: Session = Depends(get_db)):
+def list_stores(request: Request, db: Session = Depends(get_db)):
     """Get all active stores"""
     stores = db.query(Store).filter(Store.is_active == True).all()
-    return stores
+    return conditional_response(request, STORE_LIST.dump_json(STORE_LIST.validate_python(stores)), settings.CACHE_CONTROL_STORES)
 
 
 @router.get("/{store_id}", response_model=StoreResponse)
-def get_store(store_id: int, db: Session = Depends(get_db)):
+def get_store(store_id: int, request: Request, db: Session = Depends(get_db)):
     """Get store by ID"""
     store = db.query(Store).filter(Store.id == store_id).first()
     if not store:
         raise HTTPException(status_code=404, detail="Store not found")
-    return store
+    payload = StoreResponse.model_validate(store).model_dump_json().encode()
+    return conditional_response(request, payload, settings.CACHE_CONTROL_STORES)
@@ -0,0 +1,173 @@
+"""Read-through cache for serialized API responses
+
+Payloads are stored already serialized (JSON bytes) so a hit skips both the
+database and Pydantic. Each process keeps an LRU with TTL; when
+``CACHE_REDIS_URL`` is set, entries are also shared through Redis so a cold
+pod can fill from its peers. Concurrent misses on the same key wait for a
+single loader (stampede protection), and writes invalidate by key.
+
+With a shared store, other pods may serve their local copy of an invalidated
+key until its local TTL runs out, so keep ``CATALOG_CACHE_TTL_SECONDS`` short.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+cache_requests = registry.counter(
+    "cache_requests_total", "Response cache lookups by result (hit, shared_hit, miss)", ("cache", "result")
+)
+
+
+class RedisStore:
+    """Optional shared store; errors degrade to a local-only cache"""
+
+    def __init__(self, url: str, prefix: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.25)
+        self._prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self._client.get(self._prefix + key)
+        except Exception as e:
+            print(f"Shared cache get failed: {e}")
+            return None
+
+    def set(self, key: str, payload: bytes, ttl_seconds: float) -> None:
+        try:
+            self._client.set(self._prefix + key, payload, px=int(ttl_seconds * 1000))
+        except Exception as e:
+            print(f"Shared cache set failed: {e}")
+
+    def delete(self, *keys: str) -> None:
+        try:
+            self._client.delete(*(self._prefix + key for key in keys))
+        except Exception as e:
+            print(f"Shared cache delete failed: {e}")
+
+
+def build_shared_store(prefix: str):
+    if not settings.CACHE_REDIS_URL:
+        return None
+    try:
+        return RedisStore(settings.CACHE_REDIS_URL, prefix)
+    except ImportError:
+        print("CACHE_REDIS_URL is set but the 'redis' package is not installed; using the local cache only")
+        return None
+
+
+class ResponseCache:
+    """LRU + TTL cache of serialized payloads with per-key load coalescing"""
+
+    def __init__(self, name: str, ttl_seconds: float, max_size: int, shared=None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.shared = shared
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        # Bumped by invalidate() so a load that raced a write is not cached
+        self._generation = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _get_local(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _put_local(self, key: str, payload: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (payload, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _record(self, result: str) -> None:
+        cache_requests.inc((self.name, result))
+
+    def get_or_load(self, key: str, loader: Callable[[], bytes]) -> bytes:
+        """Return the cached payload for key, calling loader at most once per miss"""
+        payload = self._get_local(key)
+        if payload is not None:
+            self.hits += 1
+            self._record("hit")
+            return payload
+
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another request may have filled it while we waited
+            payload = self._get_local(key)
+            if payload is not None:
+                self.hits += 1
+                self._record("hit")
+                return payload
+
+            if self.shared is not None:
+                payload = self.shared.get(key)
+                if payload is not None:
+                    self.shared_hits += 1
+                    self._record("shared_hit")
+                    self._put_local(key, payload)
+                    return payload
+
+            self.misses += 1
+            self._record("miss")
+            generation = self._generation
+            try:
+                payload = loader()
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+
+            if generation == self._generation:
+                self._put_local(key, payload)
+                if self.shared is not None:
+                    self.shared.set(key, payload, self.ttl_seconds)
+            return payload
+
+    def invalidate(self, *keys: str) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+        if self.shared is not None and keys:
+            self.shared.delete(*keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+        }
+
+
+catalog_cache = ResponseCache(
+    "catalog",
+    ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS,
+    max_size=settings.CATALOG_CACHE_SIZE,
+    shared=build_shared_store("catalog:")
+)
@@ -7,14 +7,65 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DB_ASYNC: bool = False  # Async engine (psycopg async / aiosqlite) for ported routes
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True  # One extra round trip per checkout; recycle alone may suffice
     
     # Search
     SEARCH_MIN_SCORE: float = 0.3
+    SEARCH_BACKEND: str = "memory"  # memory | postgres | sql
+    SEARCH_INDEX_REFRESH_SECONDS: int = 300
+    
+    # Store locator
+    STORE_LOCATOR_BACKEND: str = "memory"  # memory | sql
+    STORE_INDEX_REFRESH_SECONDS: int = 300
+    STORES_NEARBY_MAX_LIMIT: int = 100
+    
+    # Catalog response cache
+    CATALOG_CACHE_TTL_SECONDS: float = 60.0
+    CATALOG_CACHE_SIZE: int = 5000
+    CACHE_REDIS_URL: str = ""  # Optional shared store, e.g. redis://localhost:6379/0
+    
+    # HTTP caching (Cache-Control per route group)
+    CACHE_CONTROL_PRODUCTS: str = "public, max-age=60"
+    CACHE_CONTROL_PRODUCT_DETAIL: str = "public, max-age=60"
+    CACHE_CONTROL_CATEGORIES: str = "public, max-age=300"
+    CACHE_CONTROL_STORES: str = "public, max-age=3600"
+    CACHE_CONTROL_REVIEWS: str = "public, max-age=30"
     
     # External Services
     NOTIFICATIONS_URL: str
+    NOTIFICATIONS_TIMEOUT: float = 5.0
     SERVICE_A_URL: str
     
+    # Inventory reservations
+    RESERVATION_TTL_SECONDS: int = 900
+    RESERVATION_SWEEP_INTERVAL: float = 60.0
+    RESERVATION_SWEEP_BATCH_SIZE: int = 1000
+    
+    # Outbox relay
+    OUTBOX_RELAY_ENABLED: bool = True
+    OUTBOX_POLL_INTERVAL: float = 0.5
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_BACKOFF_BASE: float = 2.0
+    OUTBOX_BACKOFF_MAX: float = 300.0
+    OUTBOX_LEASE_SECONDS: int = 30
+    OUTBOX_RETENTION_HOURS: int = 72  # Delivered events older than this are purged; 0 keeps them
+    OUTBOX_PURGE_INTERVAL: float = 300.0
+    OUTBOX_PURGE_BATCH_SIZE: int = 1000
+    
+    # Outbound HTTP (shared client)
+    HTTP_TIMEOUT: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = False
+    HTTP_DRAIN_TIMEOUT: float = 10.0
+    
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:5173"]
     
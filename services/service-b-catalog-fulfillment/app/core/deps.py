@@ -1,6 +1,7 @@
 """Dependency injection for FastAPI routes"""
-from typing import Generator
-from app.db.session import SessionLocal
+from typing import AsyncGenerator, Generator
+from app.db.runner import DbRunner
+from app.db.session import AsyncSessionLocal, SessionLocal
 
 
 def get_db() -> Generator:
@@ -10,3 +11,15 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[DbRunner, None]:
+    """Async database dependency (async engine when DB_ASYNC is set, else threadpool)"""
+    if AsyncSessionLocal is not None:
+        runner = DbRunner(AsyncSessionLocal())
+    else:
+        runner = DbRunner(SessionLocal())
+    try:
+        yield runner
+    finally:
+        await runner.close()
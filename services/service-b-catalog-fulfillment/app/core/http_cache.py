@@ -0,0 +1,73 @@
+"""Conditional GET support for read endpoints
+
+Responses carry a strong ETag computed from the serialized body (and a
+Last-Modified date where the route has a trustworthy one). A request whose
+``If-None-Match`` matches, or, without ``If-None-Match``, whose
+``If-Modified-Since`` is not older than Last-Modified, gets an empty 304.
+Cache-Control policies come from the ``CACHE_CONTROL_*`` settings.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response, status
+
+
+def etag_for(payload: bytes) -> str:
+    return '"' + hashlib.blake2b(payload, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as required for If-None-Match"""
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Model timestamps are naive UTC (datetime.utcnow)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified) <= _as_utc(since)
+    return False
+
+
+def conditional_response(
+    request: Request,
+    payload: bytes,
+    cache_control: str,
+    last_modified: Optional[datetime] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """JSON response for payload, or 304 Not Modified if the client copy is current"""
+    etag = etag_for(payload)
+    response_headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        response_headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    if headers:
+        response_headers.update(headers)
+
+    if not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=response_headers)
+    return Response(content=payload, media_type="application/json", headers=response_headers)
@@ -0,0 +1,69 @@
+"""Opaque cursor helpers for keyset pagination"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 200
+
+# Cursor shapes accepted by decode_cursor
+CREATED_AT_CURSOR = {"created_at": datetime, "id": int}
+ID_CURSOR = {"id": int}
+OFFSET_CURSOR = {"offset": int}
+
+
+def encode_cursor(**values: Any) -> str:
+    """Encode keyset values into an opaque, URL-safe cursor"""
+    payload = {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in values.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _coerce(value: Any, kind: type) -> Any:
+    """Convert one decoded cursor value to the expected type or raise ValueError"""
+    if kind is datetime:
+        if not isinstance(value, str):
+            raise ValueError("expected an ISO timestamp")
+        return datetime.fromisoformat(value)
+    if kind is int:
+        # bool is an int subclass; ids and offsets are never negative
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise ValueError("expected a non-negative integer")
+        return value
+    if not isinstance(value, kind):
+        raise ValueError(f"expected {kind.__name__}")
+    return value
+
+
+def decode_cursor(cursor: Optional[str], *shapes: Dict[str, type]) -> Optional[Dict[str, Any]]:
+    """Decode a cursor produced by encode_cursor
+
+    ``shapes`` lists the accepted key sets and their types, e.g.
+    ``{"created_at": datetime, "id": int}``; a cursor matching none of them
+    (such as one issued by another endpoint) is rejected with 400.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, dict):
+            raise ValueError("cursor payload must be an object")
+        for shape in shapes:
+            if set(payload) == set(shape):
+                return {key: _coerce(payload[key], kind) for key, kind in shape.items()}
+        raise ValueError("cursor does not match this endpoint")
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """Expose the next-page cursor as response metadata"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
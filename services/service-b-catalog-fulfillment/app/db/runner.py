@@ -0,0 +1,50 @@
+"""Run ORM work from async routes without blocking the event loop
+
+Route logic stays written against a sync ``Session``. With ``DB_ASYNC`` enabled
+the work runs through ``AsyncSession.run_sync`` on the async engine, so only
+awaitable driver I/O happens on the loop; otherwise it is offloaded to the
+threadpool with a regular session. Anything returned must not lazy-load
+afterwards, so build response models inside the function you pass to ``run``.
+"""
+from typing import Any, Callable, TypeVar, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+T = TypeVar("T")
+
+
+class DbRunner:
+    """Async facade over a sync or async session"""
+
+    def __init__(self, session: Union[Session, AsyncSession]):
+        self.session = session
+
+    @property
+    def is_async(self) -> bool:
+        return isinstance(self.session, AsyncSession)
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call fn(session, *args, **kwargs) off the event loop"""
+        if self.is_async:
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+    async def commit(self) -> None:
+        if self.is_async:
+            await self.session.commit()
+        else:
+            await run_in_threadpool(self.session.commit)
+
+    async def rollback(self) -> None:
+        if self.is_async:
+            await self.session.rollback()
+        else:
+            await run_in_threadpool(self.session.rollback)
+
+    async def close(self) -> None:
+        if self.is_async:
+            await self.session.close()
+        else:
+            await run_in_threadpool(self.session.close)
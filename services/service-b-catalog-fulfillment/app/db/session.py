@@ -1,11 +1,61 @@
 """Database session configuration"""
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool, db_metrics
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+# Sync drivers and their asyncio counterparts
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+psycopg",
+    "postgresql+psycopg2": "postgresql+psycopg",
+}
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Pool settings shared by the sync and async engines"""
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING, "pool_recycle": settings.DB_POOL_RECYCLE}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite uses a singleton/static pool that cannot be sized
+        return options
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    return options
+
+
+def async_database_url(url: str) -> str:
+    """Map DATABASE_URL onto its asyncio driver (psycopg async / aiosqlite)"""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+db_metrics.instrument("sync", engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Opt-in async engine; routes reach it through app.db.runner.DbRunner
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        async_database_url(settings.DATABASE_URL), **engine_options(settings.DATABASE_URL, is_async=True)
+    )
+    db_metrics.instrument("async", async_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autocommit=False, autoflush=False, expire_on_commit=False
+    )
+
 Base = declarative_base()
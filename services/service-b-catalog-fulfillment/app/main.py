@@ -1,14 +1,38 @@
 """Main FastAPI application for Service B - Catalog & Fulfillment"""
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.cache import catalog_cache
+from app.core.http_client import http_client
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.db.metrics import DbMetricsMiddleware, db_metrics
+from app.db.session import async_engine
+from app.services.outbox import outbox_relay
+from app.services.reservations import reservation_sweeper
 from app.api import catalog, inventory, stores, reviews
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop application-lifetime resources"""
+    await http_client.start()
+    outbox_relay.start()
+    reservation_sweeper.start()
+    yield
+    await reservation_sweeper.stop()
+    await outbox_relay.stop()
+    await http_client.aclose()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
 app = FastAPI(
     title="Service B - Catalog & Fulfillment",
     description="Products, categories, inventory, search, reviews, and store locations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -18,7 +42,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+app.add_middleware(DbMetricsMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(catalog.router)
@@ -40,4 +67,21 @@ def root():
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "catalog_cache": catalog_cache.stats(),
+        "outbox": outbox_relay.stats(),
+        "reservation_sweeper": reservation_sweeper.stats()
+    }
+
+
+@app.get("/health/db")
+def db_health():
+    """Connection pool and query metrics, plus backlogs that need a query to measure"""
+    return {**db_metrics.snapshot(), "outbox": outbox_relay.backlog()}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
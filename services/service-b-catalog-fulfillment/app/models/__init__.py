@@ -2,9 +2,11 @@
 from app.models.category import Category
 from app.models.product import Product, ProductImage, Variant
 from app.models.inventory import Inventory
-from app.models.review import Review
+from app.models.reservation import InventoryReservation, ReservationStatus
+from app.models.review import Review, ProductRating
 from app.models.store import Store
 from app.models.fulfillment import Fulfillment, FulfillmentStatus
+from app.models.outbox import OutboxEvent, OutboxStatus
 
 __all__ = [
     "Category",
@@ -12,8 +14,13 @@ __all__ = [
     "ProductImage",
     "Variant",
     "Inventory",
+    "InventoryReservation",
+    "ReservationStatus",
     "Review",
+    "ProductRating",
     "Store",
     "Fulfillment",
     "FulfillmentStatus",
+    "OutboxEvent",
+    "OutboxStatus",
 ]
@@ -0,0 +1,33 @@
+"""Transactional outbox model"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index
+from datetime import datetime
+import enum
+
+from app.db.session import Base
+
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    DELIVERED = "delivered"
+    FAILED = "failed"  # Gave up after OUTBOX_MAX_ATTEMPTS
+
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON string
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    delivered_at = Column(DateTime)
+
+    __table_args__ = (
+        # Relay polls pending rows that are due
+        Index("ix_outbox_events_status_next_attempt_at", "status", "next_attempt_at"),
+        # Retention purge finds old delivered rows
+        Index("ix_outbox_events_status_delivered_at", "status", "delivered_at"),
+    )
@@ -1,5 +1,5 @@
 """Product and related models"""
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, ForeignKey, DateTime, Index, func, literal_column
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -25,13 +25,27 @@ class Product(Base):
     images = relationship("ProductImage", back_populates="product", cascade="all, delete-orphan")
     variants = relationship("Variant", back_populates="product", cascade="all, delete-orphan")
     reviews = relationship("Review", back_populates="product", cascade="all, delete-orphan")
+    rating = relationship("ProductRating", uselist=False, cascade="all, delete-orphan")
+
+
+def product_search_vector():
+    """Weighted tsvector over name (A) and description (B) for full-text search"""
+    return func.setweight(
+        func.to_tsvector("simple", func.coalesce(Product.name, "")), literal_column("'A'")
+    ).op("||")(
+        func.setweight(func.to_tsvector("simple", func.coalesce(Product.description, "")), literal_column("'B'"))
+    )
+
+
+# GIN index backing the Postgres search backend
+Index("ix_products_search_vector", product_search_vector(), postgresql_using="gin").ddl_if(dialect="postgresql")
 
 
 class ProductImage(Base):
     __tablename__ = "product_images"
     
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     url = Column(String, nullable=False)
     alt_text = Column(String)
     is_primary = Column(Boolean, default=False)
@@ -45,7 +59,7 @@ class Variant(Base):
     __tablename__ = "variants"
     
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     sku = Column(String, nullable=False, unique=True, index=True)
     name = Column(String, nullable=False)  # e.g., "Small - Red"
     price = Column(Float, nullable=False)
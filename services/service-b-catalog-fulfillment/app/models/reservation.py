@@ -0,0 +1,33 @@
+"""Inventory reservation ledger model"""
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Index, UniqueConstraint
+from datetime import datetime
+import enum
+
+from app.db.session import Base
+
+
+class ReservationStatus(str, enum.Enum):
+    RESERVED = "reserved"
+    COMMITTED = "committed"
+    RELEASED = "released"
+    EXPIRED = "expired"
+
+
+class InventoryReservation(Base):
+    __tablename__ = "inventory_reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, nullable=False, index=True)  # Reference to Service A
+    variant_id = Column(Integer, ForeignKey("variants.id"), nullable=False)
+    sku = Column(String, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    status = Column(Enum(ReservationStatus), default=ReservationStatus.RESERVED, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("order_id", "variant_id", name="uq_inventory_reservations_order_variant"),
+        # Expiry sweeper scans active reservations by deadline
+        Index("ix_inventory_reservations_status_expires_at", "status", "expires_at"),
+    )
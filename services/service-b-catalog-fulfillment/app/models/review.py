@@ -1,5 +1,5 @@
-"""Review model"""
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+"""Review and rating summary models"""
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -20,3 +20,37 @@ class Review(Base):
     
     # Relationships
     product = relationship("Product", back_populates="reviews")
+    
+    __table_args__ = (
+        # Serves newest-first keyset pagination per product
+        Index("ix_reviews_product_id_created_at_id", "product_id", "created_at", "id"),
+    )
+
+
+class ProductRating(Base):
+    """Per-product review aggregates, maintained incrementally on review creation"""
+    __tablename__ = "product_ratings"
+    
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_1 = Column(Integer, nullable=False, default=0)
+    rating_2 = Column(Integer, nullable=False, default=0)
+    rating_3 = Column(Integer, nullable=False, default=0)
+    rating_4 = Column(Integer, nullable=False, default=0)
+    rating_5 = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @property
+    def average_rating(self):
+        return round(self.rating_sum / self.review_count, 2) if self.review_count else None
+    
+    @property
+    def rating_histogram(self):
+        return {
+            1: self.rating_1,
+            2: self.rating_2,
+            3: self.rating_3,
+            4: self.rating_4,
+            5: self.rating_5,
+        }
@@ -14,8 +14,8 @@ class Store(Base):
     state = Column(String, nullable=False)
     postal_code = Column(String, nullable=False)
     country = Column(String, nullable=False, default="USA")
-    latitude = Column(Float, nullable=False)
-    longitude = Column(Float, nullable=False)
+    latitude = Column(Float, nullable=False, index=True)  # Bounding-box prefilter for /stores/nearby
+    longitude = Column(Float, nullable=False, index=True)
     phone = Column(String)
     email = Column(String)
     is_active = Column(Boolean, default=True)
@@ -1,8 +1,10 @@
 """Catalog schemas"""
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
 from datetime import datetime
 
+from app.schemas.review import RatingSummary
+
 
 class CategoryBase(BaseModel):
     name: str
@@ -50,6 +52,20 @@ class VariantWithInventory(VariantResponse):
     available_quantity: int = 0
 
 
+class VariantBatchRequest(BaseModel):
+    skus: List[str] = Field(..., max_length=500)
+
+
+class VariantPriceResponse(BaseModel):
+    sku: str
+    variant_id: int
+    product_id: int
+    product_name: str
+    variant_name: str
+    price: float
+    is_active: bool
+
+
 class ProductBase(BaseModel):
     name: str
     slug: str
@@ -84,6 +100,17 @@ class ProductResponse(ProductBase):
         from_attributes = True
 
 
+class ProductDetailResponse(ProductResponse):
+    variants: List[VariantWithInventory] = []
+    rating: RatingSummary = RatingSummary()
+    
+    @field_validator("rating", mode="before")
+    @classmethod
+    def default_rating(cls, value):
+        # Products without reviews have no summary row yet
+        return RatingSummary() if value is None else value
+
+
 class ProductListResponse(BaseModel):
     id: int
     name: str
@@ -92,6 +119,8 @@ class ProductListResponse(BaseModel):
     featured: bool
     category_id: int
     primary_image: Optional[str] = None
+    review_count: int = 0
+    average_rating: Optional[float] = None
     
     class Config:
         from_attributes = True
@@ -1,6 +1,6 @@
 """Inventory schemas"""
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 
 class InventoryResponse(BaseModel):
@@ -16,7 +16,7 @@ class InventoryResponse(BaseModel):
 
 class ReserveInventoryItem(BaseModel):
     sku: str
-    quantity: int
+    quantity: int = Field(..., gt=0)
 
 
 class ReserveInventoryRequest(BaseModel):
@@ -1,12 +1,12 @@
 """Review schemas"""
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 
 class ReviewCreate(BaseModel):
     product_id: int
-    rating: int  # 1-5
+    rating: int = Field(..., ge=1, le=5)
     title: Optional[str] = None
     comment: Optional[str] = None
 
@@ -23,3 +23,12 @@ class ReviewResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class RatingSummary(BaseModel):
+    review_count: int = 0
+    average_rating: Optional[float] = None
+    rating_histogram: Dict[int, int] = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+    
+    class Config:
+        from_attributes = True
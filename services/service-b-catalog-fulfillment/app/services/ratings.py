@@ -0,0 +1,78 @@
+"""Per-product review aggregates
+
+``product_ratings`` holds one row per reviewed product: review count, rating
+sum and a 1-5 histogram. ``record_rating`` bumps it in the same transaction as
+the review insert with a single upsert, so concurrent reviews of one product
+never lose an increment. ``backfill_ratings`` recomputes every row from the
+reviews table with one GROUP BY.
+"""
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import case, func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import ProductRating, Review
+
+RATING_COLUMNS = {rating: f"rating_{rating}" for rating in range(1, 6)}
+
+_UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def record_rating(db: Session, product_id: int, rating: int) -> None:
+    """Add one review's rating to the product's aggregates (caller commits)"""
+    column = RATING_COLUMNS[rating]
+    now = datetime.utcnow()
+    increments = {
+        "review_count": ProductRating.review_count + 1,
+        "rating_sum": ProductRating.rating_sum + rating,
+        column: getattr(ProductRating, column) + 1,
+        "updated_at": now,
+    }
+
+    upsert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if upsert is not None:
+        db.execute(
+            upsert(ProductRating)
+            .values(product_id=product_id, review_count=1, rating_sum=rating, updated_at=now, **{column: 1})
+            .on_conflict_do_update(index_elements=[ProductRating.product_id], set_=increments)
+        )
+        return
+
+    updated = db.query(ProductRating).filter(ProductRating.product_id == product_id).update(
+        increments, synchronize_session=False
+    )
+    if not updated:
+        db.add(ProductRating(product_id=product_id, review_count=1, rating_sum=rating, **{column: 1}))
+
+
+def get_rating_summaries(db: Session, product_ids: List[int]) -> Dict[int, ProductRating]:
+    """Aggregates for a page of products in one query (unreviewed products are absent)"""
+    if not product_ids:
+        return {}
+    rows = db.query(ProductRating).filter(ProductRating.product_id.in_(product_ids)).all()
+    return {row.product_id: row for row in rows}
+
+
+def backfill_ratings(db: Session) -> int:
+    """Rebuild all aggregates from existing reviews (caller commits); returns products written"""
+    counts = [
+        func.sum(case((Review.rating == rating, 1), else_=0)).label(column)
+        for rating, column in RATING_COLUMNS.items()
+    ]
+    rows = db.query(
+        Review.product_id,
+        func.count(Review.id).label("review_count"),
+        func.sum(Review.rating).label("rating_sum"),
+        *counts
+    ).filter(Review.rating.between(1, 5)).group_by(Review.product_id).all()
+
+    now = datetime.utcnow()
+    db.query(ProductRating).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(ProductRating), [{**row._asdict(), "updated_at": now} for row in rows])
+    return len(rows)
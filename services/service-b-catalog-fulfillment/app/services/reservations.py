@@ -0,0 +1,260 @@
+"""Inventory reservation engine
+
+All SKUs of an order are resolved in one query, then each inventory row is
+decremented with a conditional UPDATE (``available >= :qty``) so concurrent
+checkouts of the same SKU cannot oversell. Rows are updated in inventory id
+order to keep lock acquisition deterministic across transactions. The caller
+owns the transaction: on ``ReservationError`` it must roll back, which undoes
+every line of the order.
+
+Every reserved line is recorded in the ``inventory_reservations`` ledger so
+commit, release and expiry can settle all lines of an order (or a batch of
+stale reservations) with set-based statements.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import Inventory, Variant
+from app.models.reservation import InventoryReservation, ReservationStatus
+
+
+class ReservationError(Exception):
+    """Reservation cannot be satisfied; the whole order must be rolled back"""
+
+
+class ReservedLine(NamedTuple):
+    sku: str
+    variant_id: int
+    quantity: int
+    available: int
+    low_stock_threshold: int
+
+
+def _merge_quantities(items: Iterable) -> Dict[str, int]:
+    """Collapse repeated SKUs into a single requested quantity"""
+    quantities: Dict[str, int] = OrderedDict()
+    for item in items:
+        quantities[item.sku] = quantities.get(item.sku, 0) + item.quantity
+    return quantities
+
+
+def order_has_reservation(db: Session, order_id: int) -> bool:
+    """Whether the order already holds (or has committed) a reservation"""
+    return db.query(InventoryReservation.id).filter(
+        InventoryReservation.order_id == order_id,
+        InventoryReservation.status.in_([ReservationStatus.RESERVED, ReservationStatus.COMMITTED])
+    ).first() is not None
+
+
+def reserve_items(db: Session, order_id: int, items: Iterable) -> List[ReservedLine]:
+    """Reserve stock for every item and record it in the ledger, or raise ReservationError"""
+    quantities = _merge_quantities(items)
+    if not quantities:
+        return []
+
+    rows = db.query(
+        Variant.sku, Variant.id, Inventory.id, Inventory.low_stock_threshold
+    ).outerjoin(Inventory, Inventory.variant_id == Variant.id).filter(
+        Variant.sku.in_(list(quantities))
+    ).all()
+    resolved = {sku: (variant_id, inventory_id, threshold) for sku, variant_id, inventory_id, threshold in rows}
+
+    for sku in quantities:
+        if sku not in resolved:
+            raise ReservationError(f"SKU {sku} not found")
+        if resolved[sku][1] is None:
+            raise ReservationError(f"Inventory not found for SKU {sku}")
+
+    reserved = []
+    for sku in sorted(quantities, key=lambda s: resolved[s][1]):
+        variant_id, inventory_id, threshold = resolved[sku]
+        quantity = quantities[sku]
+
+        available = db.execute(
+            update(Inventory)
+            .where(Inventory.id == inventory_id, Inventory.available >= quantity)
+            .values(
+                reserved=Inventory.reserved + quantity,
+                available=Inventory.available - quantity
+            )
+            .returning(Inventory.available)
+        ).scalar_one_or_none()
+
+        if available is None:
+            current = db.query(Inventory.available).filter(Inventory.id == inventory_id).scalar()
+            raise ReservationError(
+                f"Insufficient stock for SKU {sku}. Available: {current}, Requested: {quantity}"
+            )
+
+        reserved.append(ReservedLine(sku, variant_id, quantity, available, threshold or 0))
+
+    # Lines from an earlier released/expired attempt would collide with the new ones
+    db.query(InventoryReservation).filter(
+        InventoryReservation.order_id == order_id,
+        InventoryReservation.status.in_([ReservationStatus.RELEASED, ReservationStatus.EXPIRED])
+    ).delete(synchronize_session=False)
+
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=settings.RESERVATION_TTL_SECONDS)
+    db.execute(insert(InventoryReservation), [
+        {
+            "order_id": order_id,
+            "variant_id": line.variant_id,
+            "sku": line.sku,
+            "quantity": line.quantity,
+            "status": ReservationStatus.RESERVED,
+            "expires_at": expires_at,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for line in reserved
+    ])
+
+    return reserved
+
+
+def settle_reservations(db: Session, reservation_ids: List[int], new_status: ReservationStatus) -> int:
+    """
+    Move locked RESERVED ledger rows to a final status and apply them to stock
+    with one UPDATE on inventory and one on the ledger. COMMITTED consumes the
+    stock; RELEASED/EXPIRED return it to available.
+    """
+    if not reservation_ids:
+        return 0
+
+    reserved_qty = select(func.coalesce(func.sum(InventoryReservation.quantity), 0)).where(
+        InventoryReservation.id.in_(reservation_ids),
+        InventoryReservation.variant_id == Inventory.variant_id
+    ).scalar_subquery()
+    touched_variants = select(InventoryReservation.variant_id).where(InventoryReservation.id.in_(reservation_ids))
+
+    if new_status == ReservationStatus.COMMITTED:
+        values = {"quantity": Inventory.quantity - reserved_qty, "reserved": Inventory.reserved - reserved_qty}
+    else:
+        values = {"reserved": Inventory.reserved - reserved_qty, "available": Inventory.available + reserved_qty}
+
+    db.execute(
+        update(Inventory).where(Inventory.variant_id.in_(touched_variants)).values(**values),
+        execution_options={"synchronize_session": False}
+    )
+    db.execute(
+        update(InventoryReservation)
+        .where(InventoryReservation.id.in_(reservation_ids))
+        .values(status=new_status, updated_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    return len(reservation_ids)
+
+
+def _lock_active_lines(db: Session, order_id: int) -> List[int]:
+    """Lock the order's active ledger rows; concurrent settles of the same order serialize here"""
+    rows = db.query(InventoryReservation.id).filter(
+        InventoryReservation.order_id == order_id,
+        InventoryReservation.status == ReservationStatus.RESERVED
+    ).with_for_update().all()
+    return [row.id for row in rows]
+
+
+def commit_order(db: Session, order_id: int) -> int:
+    """Finalize all reserved lines of an order; returns the number of lines settled"""
+    return settle_reservations(db, _lock_active_lines(db, order_id), ReservationStatus.COMMITTED)
+
+
+def release_order(db: Session, order_id: int) -> int:
+    """Return all reserved lines of an order to available stock"""
+    return settle_reservations(db, _lock_active_lines(db, order_id), ReservationStatus.RELEASED)
+
+
+def order_is_committed(db: Session, order_id: int) -> bool:
+    return db.query(InventoryReservation.id).filter(
+        InventoryReservation.order_id == order_id,
+        InventoryReservation.status == ReservationStatus.COMMITTED
+    ).first() is not None
+
+
+def expire_stale_reservations(db: Session, batch_size: int) -> int:
+    """Expire one batch of reservations past their deadline (caller commits)"""
+    rows = db.query(InventoryReservation.id).filter(
+        InventoryReservation.status == ReservationStatus.RESERVED,
+        InventoryReservation.expires_at < datetime.utcnow()
+    ).order_by(InventoryReservation.expires_at).limit(batch_size).with_for_update(skip_locked=True).all()
+    return settle_reservations(db, [row.id for row in rows], ReservationStatus.EXPIRED)
+
+
+class ReservationSweeper:
+    """Background job that releases abandoned reservations in batches"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.expired = 0
+        self.last_sweep_seconds = 0.0
+        self.last_sweep_count = 0
+
+    def start(self) -> None:
+        if self._task is None and settings.RESERVATION_SWEEP_INTERVAL > 0:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                print(f"Reservation sweep failed: {e}")
+            await asyncio.sleep(settings.RESERVATION_SWEEP_INTERVAL)
+
+    def sweep(self) -> int:
+        """Expire every stale reservation, one committed batch at a time"""
+        started = time.perf_counter()
+        total = 0
+        while not self._stopping:
+            db = SessionLocal()
+            try:
+                count = expire_stale_reservations(db, settings.RESERVATION_SWEEP_BATCH_SIZE)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+            total += count
+            if count < settings.RESERVATION_SWEEP_BATCH_SIZE:
+                break
+
+        self.expired += total
+        self.last_sweep_count = total
+        self.last_sweep_seconds = time.perf_counter() - started
+        return total
+
+    def stats(self) -> Dict:
+        return {
+            "expired": self.expired,
+            "last_sweep_count": self.last_sweep_count,
+            "last_sweep_seconds": self.last_sweep_seconds,
+            "last_sweep_rate": (
+                self.last_sweep_count / self.last_sweep_seconds if self.last_sweep_seconds else 0.0
+            ),
+        }
+
+
+reservation_sweeper = ReservationSweeper()
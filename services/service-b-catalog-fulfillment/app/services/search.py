@@ -0,0 +1,226 @@
+"""Pluggable product search backends
+
+The catalog search endpoint asks the configured backend for a ranked page of
+product IDs. A backend returns ``None`` when it cannot answer (index not built,
+database without full-text support, ...) and the caller falls back to the SQL
+``ILIKE`` path.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Product
+from app.models.product import product_search_vector
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Field weights used for ranking (name matches outrank description matches)
+FIELD_WEIGHTS = {"name": 3.0, "description": 1.0}
+EXACT_MATCH_BONUS = 1.5
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase alphanumeric tokens"""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchBackend:
+    """Base class for search backends"""
+
+    name = "base"
+
+    def search(self, db: Session, q: str, skip: int, limit: int) -> Optional[List[int]]:
+        """Return ranked product IDs for a query, or None to fall back to SQL"""
+        return None
+
+    def index_product(self, product: Product) -> None:
+        """Add or refresh a product in the index"""
+
+    def remove_product(self, product_id: int) -> None:
+        """Remove a product from the index"""
+
+
+class SqlSearchBackend(SearchBackend):
+    """No index; always use the SQL ILIKE path"""
+
+    name = "sql"
+
+
+class InMemorySearchIndex(SearchBackend):
+    """In-process inverted index with prefix matching and field-weighted ranking"""
+
+    name = "memory"
+
+    def __init__(self, refresh_seconds: int = 300):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._doc_terms: Dict[int, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        self._built_at: Optional[float] = None
+
+    def _needs_rebuild(self) -> bool:
+        if self._built_at is None:
+            return True
+        return self.refresh_seconds > 0 and time.monotonic() - self._built_at > self.refresh_seconds
+
+    def rebuild(self, db: Session) -> None:
+        """Rebuild the whole index from active products"""
+        with self._lock:
+            self._load(db)
+
+    def _refresh_if_needed(self, db: Session) -> None:
+        if not self._needs_rebuild():
+            return
+        with self._lock:
+            # Requests that waited on another's rebuild must not reload the table again
+            if self._needs_rebuild():
+                self._load(db)
+
+    def _load(self, db: Session) -> None:
+        # Runs under the lock, so index_product calls made meanwhile apply on top of the new index
+        rows = db.query(Product.id, Product.name, Product.description).filter(
+            Product.is_active == True
+        ).all()
+
+        self._postings = defaultdict(dict)
+        self._doc_terms = {}
+        for product_id, name, description in rows:
+            self._add(product_id, name, description)
+        self._vocabulary = sorted(self._postings)
+        self._vocabulary_dirty = False
+        self._built_at = time.monotonic()
+
+    def _add(self, product_id: int, name: Optional[str], description: Optional[str]) -> None:
+        terms: Dict[str, float] = defaultdict(float)
+        for field, text in (("name", name), ("description", description)):
+            for token in tokenize(text):
+                terms[token] += FIELD_WEIGHTS[field]
+
+        for token, weight in terms.items():
+            self._postings[token][product_id] = weight
+        self._doc_terms[product_id] = set(terms)
+
+    def _remove(self, product_id: int) -> None:
+        for token in self._doc_terms.pop(product_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[token]
+
+    def index_product(self, product: Product) -> None:
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._remove(product.id)
+            if product.is_active:
+                self._add(product.id, product.name, product.description)
+            self._vocabulary_dirty = True
+
+    def remove_product(self, product_id: int) -> None:
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._remove(product_id)
+            self._vocabulary_dirty = True
+
+    def _expand(self, token: str) -> Iterable[str]:
+        """Vocabulary terms starting with the given prefix"""
+        start = bisect_left(self._vocabulary, token)
+        for term in self._vocabulary[start:]:
+            if not term.startswith(token):
+                break
+            yield term
+
+    def search(self, db: Session, q: str, skip: int, limit: int) -> Optional[List[int]]:
+        self._refresh_if_needed(db)
+
+        tokens = tokenize(q)
+        if not tokens:
+            return []
+
+        with self._lock:
+            if self._vocabulary_dirty:
+                self._vocabulary = sorted(self._postings)
+                self._vocabulary_dirty = False
+
+            scores: Optional[Dict[int, float]] = None
+            for token in tokens:
+                token_scores: Dict[int, float] = defaultdict(float)
+                for term in self._expand(token):
+                    bonus = EXACT_MATCH_BONUS if term == token else 1.0
+                    for product_id, weight in self._postings[term].items():
+                        token_scores[product_id] = max(token_scores[product_id], weight * bonus)
+
+                # Every query token must match (AND semantics)
+                if scores is None:
+                    scores = dict(token_scores)
+                else:
+                    scores = {
+                        product_id: score + token_scores[product_id]
+                        for product_id, score in scores.items()
+                        if product_id in token_scores
+                    }
+                if not scores:
+                    return []
+
+        # Ranking only orders results; every product matching all tokens is returned
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [product_id for product_id, _ in ranked[skip:skip + limit]]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Full-text search on a weighted Postgres tsvector (GIN indexed)"""
+
+    name = "postgres"
+
+    def search(self, db: Session, q: str, skip: int, limit: int) -> Optional[List[int]]:
+        if db.get_bind().dialect.name != "postgresql":
+            return None
+
+        tokens = tokenize(q)
+        if not tokens:
+            return []
+
+        # Prefix match every token: "wire head" -> "wire:* & head:*"
+        ts_query = func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+        rank = func.ts_rank(product_search_vector(), ts_query)
+
+        rows = db.query(Product.id).filter(
+            Product.is_active == True,
+            product_search_vector().op("@@")(ts_query)
+        ).order_by(rank.desc(), Product.id).offset(skip).limit(limit).all()
+        return [row.id for row in rows]
+
+
+_BACKENDS = {
+    SqlSearchBackend.name: SqlSearchBackend,
+    InMemorySearchIndex.name: InMemorySearchIndex,
+    PostgresSearchBackend.name: PostgresSearchBackend,
+}
+
+_backend: Optional[SearchBackend] = None
+
+
+def get_search_backend() -> SearchBackend:
+    """Get the configured search backend (created once per process)"""
+    global _backend
+    if _backend is None:
+        backend_cls = _BACKENDS.get(settings.SEARCH_BACKEND, SqlSearchBackend)
+        if backend_cls is InMemorySearchIndex:
+            _backend = InMemorySearchIndex(refresh_seconds=settings.SEARCH_INDEX_REFRESH_SECONDS)
+        else:
+            _backend = backend_cls()
+    return _backend
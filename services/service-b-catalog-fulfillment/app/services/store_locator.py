@@ -0,0 +1,240 @@
+"""Nearest-store lookups for /stores/nearby
+
+Locators return ``(store_id, distance_km)`` pairs, nearest first. The SQL
+locator prefilters with a bounding box on the indexed latitude/longitude
+columns and runs haversine on the candidates only. The in-memory index keeps
+active store coordinates in NumPy arrays sorted by latitude: a query slices the
+latitude band with ``searchsorted`` and computes distances vectorized over that
+band. Store writes mark it stale (after commit), and it is also refreshed
+periodically to pick up changes made by other processes.
+"""
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models import Store
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is in requirements.txt
+    np = None
+
+EARTH_RADIUS_KM = 6371.0
+
+LngRanges = Optional[List[Tuple[float, float]]]
+
+
+def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calculate distance between two points using Haversine formula (in km)"""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, LngRanges]:
+    """
+    Latitude band and longitude ranges that contain every point within
+    radius_km. Longitude ranges are None when the box spans all longitudes
+    (a pole is inside the circle) and split in two across the antimeridian.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    min_lat = lat - math.degrees(angular)
+    max_lat = lat + math.degrees(angular)
+    if min_lat <= -90 or max_lat >= 90 or angular >= math.pi / 2:
+        return max(min_lat, -90.0), min(max_lat, 90.0), None
+
+    ratio = math.sin(angular) / math.cos(math.radians(lat))
+    if ratio >= 1:
+        return min_lat, max_lat, None
+    delta_lng = math.degrees(math.asin(ratio))
+    low, high = lng - delta_lng, lng + delta_lng
+    if low < -180:
+        return min_lat, max_lat, [(low + 360, 180.0), (-180.0, high)]
+    if high > 180:
+        return min_lat, max_lat, [(low, 180.0), (-180.0, high - 360)]
+    return min_lat, max_lat, [(low, high)]
+
+
+def nearest(matches: Sequence[Tuple[int, float]], limit: Optional[int]) -> List[Tuple[int, float]]:
+    ordered = sorted(matches, key=lambda match: match[1])
+    return ordered[:limit] if limit else ordered
+
+
+class StoreLocator(ABC):
+    """Base class for store locators"""
+
+    name = "base"
+
+    @abstractmethod
+    def nearby(
+        self, db: Session, lat: float, lng: float, radius_km: float, limit: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """Active stores within radius_km as (store_id, distance_km), nearest first"""
+
+    def mark_stale(self) -> None:
+        """Store data changed; rebuild before the next query"""
+
+
+class SqlStoreLocator(StoreLocator):
+    """Bounding-box prefilter in SQL, exact haversine on the candidates"""
+
+    name = "sql"
+
+    def nearby(self, db, lat, lng, radius_km, limit=None):
+        min_lat, max_lat, lng_ranges = bounding_box(lat, lng, radius_km)
+        query = db.query(Store.id, Store.latitude, Store.longitude).filter(
+            Store.is_active == True,
+            Store.latitude.between(min_lat, max_lat)
+        )
+        if lng_ranges is not None:
+            query = query.filter(or_(*(
+                and_(Store.longitude >= low, Store.longitude <= high) for low, high in lng_ranges
+            )))
+
+        matches = []
+        for store_id, store_lat, store_lng in query.all():
+            distance = calculate_distance(lat, lng, store_lat, store_lng)
+            if distance <= radius_km:
+                matches.append((store_id, distance))
+        return nearest(matches, limit)
+
+
+class InMemoryStoreIndex(StoreLocator):
+    """Latitude-sorted NumPy arrays with vectorized haversine over the query band"""
+
+    name = "memory"
+
+    def __init__(self, refresh_seconds: int = 300):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._generation_lock = threading.Lock()
+        # Bumped by every store write; the index is current while it matches _built_generation
+        self._generation = 0
+        self._built_generation = -1
+        self._built_at: Optional[float] = None
+        # (ids, lat_deg, lng_deg, lat_rad, lng_rad, cos_lat), swapped as a whole on rebuild
+        self._arrays = None
+
+    def mark_stale(self) -> None:
+        with self._generation_lock:
+            self._generation += 1
+
+    def _needs_rebuild(self) -> bool:
+        if self._built_generation != self._generation or self._built_at is None:
+            return True
+        return self.refresh_seconds > 0 and time.monotonic() - self._built_at > self.refresh_seconds
+
+    def rebuild(self, db: Session) -> None:
+        """Reload coordinates of all active stores"""
+        with self._lock:
+            self._load(db)
+
+    def _refresh_if_needed(self, db: Session) -> None:
+        if not self._needs_rebuild():
+            return
+        with self._lock:
+            # Requests that waited on another's rebuild must not reload the table again
+            if self._needs_rebuild():
+                self._load(db)
+
+    def _load(self, db: Session) -> None:
+        # Taken before reading: a write committed from here on bumps the generation
+        # again, so the next query rebuilds even if these rows predate it
+        generation = self._generation
+        rows = db.query(Store.id, Store.latitude, Store.longitude).filter(
+            Store.is_active == True
+        ).all()
+
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        lat_deg = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+        lng_deg = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+        order = np.argsort(lat_deg, kind="stable")
+        ids, lat_deg, lng_deg = ids[order], lat_deg[order], lng_deg[order]
+        lat_rad = np.radians(lat_deg)
+        self._arrays = (ids, lat_deg, lng_deg, lat_rad, np.radians(lng_deg), np.cos(lat_rad))
+        self._built_at = time.monotonic()
+        self._built_generation = generation
+
+    def nearby(self, db, lat, lng, radius_km, limit=None):
+        self._refresh_if_needed(db)
+        ids, lat_deg, lng_deg, lat_rad, lng_rad, cos_lat = self._arrays
+
+        min_lat, max_lat, lng_ranges = bounding_box(lat, lng, radius_km)
+        start = np.searchsorted(lat_deg, min_lat, side="left")
+        stop = np.searchsorted(lat_deg, max_lat, side="right")
+        band = np.arange(start, stop)
+        if lng_ranges is not None and band.size:
+            band_lng = lng_deg[band]
+            mask = np.zeros(band.size, dtype=bool)
+            for low, high in lng_ranges:
+                mask |= (band_lng >= low) & (band_lng <= high)
+            band = band[mask]
+        if not band.size:
+            return []
+
+        origin_lat = math.radians(lat)
+        a = (
+            np.sin((lat_rad[band] - origin_lat) / 2) ** 2
+            + math.cos(origin_lat) * cos_lat[band] * np.sin((lng_rad[band] - math.radians(lng)) / 2) ** 2
+        )
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+        within = distances <= radius_km
+        band, distances = band[within], distances[within]
+        if limit and distances.size > limit:
+            # k nearest without sorting the whole band
+            top = np.argpartition(distances, limit - 1)[:limit]
+            band, distances = band[top], distances[top]
+        order = np.argsort(distances, kind="stable")
+        return list(zip(ids[band[order]].tolist(), distances[order].tolist()))
+
+
+_BACKENDS = {
+    "sql": SqlStoreLocator,
+    "memory": InMemoryStoreIndex,
+}
+
+_locator: Optional[StoreLocator] = None
+
+
+def get_store_locator() -> StoreLocator:
+    """Get the configured store locator (created once per process)"""
+    global _locator
+    if _locator is None:
+        locator_cls = _BACKENDS.get(settings.STORE_LOCATOR_BACKEND, SqlStoreLocator)
+        if locator_cls is InMemoryStoreIndex and np is None:
+            print("STORE_LOCATOR_BACKEND=memory requires numpy; using the SQL locator")
+            locator_cls = SqlStoreLocator
+        if locator_cls is InMemoryStoreIndex:
+            _locator = InMemoryStoreIndex(refresh_seconds=settings.STORE_INDEX_REFRESH_SECONDS)
+        else:
+            _locator = locator_cls()
+    return _locator
+
+
+# Store writes mark the index stale once committed
+@event.listens_for(Store, "after_insert")
+@event.listens_for(Store, "after_update")
+@event.listens_for(Store, "after_delete")
+def _store_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["stores_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _stores_committed(session):
+    if session.info.pop("stores_changed", False) and _locator is not None:
+        _locator.mark_stale()
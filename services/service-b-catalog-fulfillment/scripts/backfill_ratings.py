@@ -0,0 +1,31 @@
+"""Backfill per-product review aggregates for Service B - Catalog & Fulfillment"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.db.session import SessionLocal, engine, Base
+from app.services.ratings import backfill_ratings
+
+
+def run_backfill():
+    """Recompute product_ratings from the reviews table"""
+    print("Backfilling product ratings...")
+    
+    Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    
+    try:
+        products = backfill_ratings(db)
+        db.commit()
+        print(f"✓ Rating aggregates written for {products} products")
+    except Exception as e:
+        print(f"Error backfilling ratings: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run_backfill()
@@ -0,0 +1,76 @@
+"""Shared fixtures: a throwaway SQLite database and a seeded catalog"""
+import os
+import sys
+import tempfile
+
+# Settings are read at import time, so configure them before importing the app
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/catalog-test.db")
+os.environ.setdefault("NOTIFICATIONS_URL", "http://notifications.invalid/notify")
+os.environ.setdefault("SERVICE_A_URL", "http://service-a.invalid")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.cache import catalog_cache
+from app.db.session import Base, SessionLocal, engine
+from app.main import app
+from app.models import Category, Inventory, Product, ProductImage, Variant
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    # Not used as a context manager, so background workers are not started
+    catalog_cache.clear()
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def products(database):
+    """Five active products, each with two images and three stocked variants"""
+    session = SessionLocal()
+    try:
+        category = Category(name="Test category", slug="test-category")
+        session.add(category)
+        for i in range(5):
+            product = Product(
+                category=category,
+                name=f"Test product {i}",
+                slug=f"test-product-{i}",
+                description="Seeded for tests",
+                base_price=10.0 + i
+            )
+            product.images = [
+                ProductImage(url=f"https://img.test/{i}/{n}.jpg", is_primary=n == 0, display_order=n)
+                for n in range(2)
+            ]
+            product.variants = [
+                Variant(
+                    sku=f"TEST-{i}-{n}",
+                    name=f"Variant {n}",
+                    price=10.0 + i,
+                    inventory=Inventory(quantity=20, reserved=0, available=20)
+                )
+                for n in range(3)
+            ]
+            session.add(product)
+        session.commit()
+        return [product.id for product in session.query(Product).filter(Product.category_id == category.id)]
+    finally:
+        session.close()
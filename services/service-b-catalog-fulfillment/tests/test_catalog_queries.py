@@ -0,0 +1,35 @@
+"""Query-count regression tests for the catalog read routes"""
+from app.db.metrics import count_queries
+
+# Listing: products, primary images, rating summaries. Detail: product with
+# rating, images, variants with inventory. Neither may grow with the data.
+PRODUCT_LIST_QUERIES = 3
+PRODUCT_DETAIL_QUERIES = 3
+
+
+def test_product_list_query_count(client, products):
+    with count_queries() as queries:
+        response = client.get("/catalog/products")
+
+    assert response.status_code == 200
+    assert len(response.json()) >= len(products)
+    assert queries.count == PRODUCT_LIST_QUERIES
+
+
+def test_product_detail_query_count(client, products):
+    with count_queries() as queries:
+        response = client.get(f"/catalog/products/{products[0]}")
+
+    assert response.status_code == 200
+    assert len(response.json()["variants"]) == 3
+    assert queries.count == PRODUCT_DETAIL_QUERIES
+
+
+def test_cached_product_detail_issues_no_queries(client, products):
+    client.get(f"/catalog/products/{products[1]}")
+
+    with count_queries() as queries:
+        response = client.get(f"/catalog/products/{products[1]}")
+
+    assert response.status_code == 200
+    assert queries.count == 0
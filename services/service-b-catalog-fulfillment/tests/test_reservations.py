@@ -0,0 +1,91 @@
+"""Concurrency tests for the reservation engine"""
+import threading
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+
+from app.db.session import SessionLocal
+from app.models import Inventory, Product, Variant
+from app.models.reservation import InventoryReservation, ReservationStatus
+from app.schemas.inventory import ReserveInventoryItem
+from app.services.reservations import ReservationError, reserve_items
+
+ON_HAND = 10
+WORKERS = 24
+
+
+@pytest.fixture
+def scarce_sku(db, products):
+    """A variant with little stock, shared by every concurrent order"""
+    product = db.query(Product).filter(Product.id == products[0]).one()
+    variant = Variant(
+        product=product,
+        sku="TEST-SCARCE",
+        name="Scarce",
+        price=product.base_price,
+        inventory=Inventory(quantity=ON_HAND, reserved=0, available=ON_HAND)
+    )
+    db.add(variant)
+    db.commit()
+    yield variant.sku
+    db.query(InventoryReservation).filter(InventoryReservation.variant_id == variant.id).delete()
+    db.delete(variant)
+    db.commit()
+
+
+def test_concurrent_reservations_never_oversell(scarce_sku):
+    barrier = threading.Barrier(WORKERS)
+    reserved = {}
+    lock = threading.Lock()
+
+    def place(order_id: int, quantity: int) -> None:
+        barrier.wait()
+        # SQLite reports write contention as "database is locked" instead of waiting
+        for _ in range(50):
+            session = SessionLocal()
+            try:
+                reserve_items(session, order_id, [ReserveInventoryItem(sku=scarce_sku, quantity=quantity)])
+                session.commit()
+                with lock:
+                    reserved[order_id] = quantity
+                return
+            except ReservationError:
+                session.rollback()
+                return
+            except OperationalError:
+                session.rollback()
+            finally:
+                session.close()
+
+    threads = [
+        threading.Thread(target=place, args=(10_000 + i, 1 + i % 3))
+        for i in range(WORKERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    session = SessionLocal()
+    try:
+        inventory = session.query(Inventory).join(Variant).filter(Variant.sku == scarce_sku).one()
+        ledger_orders, ledger_total = session.query(
+            func.count(func.distinct(InventoryReservation.order_id)),
+            func.coalesce(func.sum(InventoryReservation.quantity), 0)
+        ).filter(
+            InventoryReservation.sku == scarce_sku,
+            InventoryReservation.status == ReservationStatus.RESERVED
+        ).one()
+    finally:
+        session.close()
+
+    total = sum(reserved.values())
+    assert reserved, "no reservation succeeded"
+    assert total <= ON_HAND
+    # Demand far exceeds stock, so failures must come from stock running out, not from lost updates
+    assert ON_HAND - total < 3
+    assert inventory.reserved == total
+    assert inventory.available == ON_HAND - total
+    assert inventory.quantity == ON_HAND
+    assert (ledger_orders, ledger_total) == (len(reserved), total)
@@ -0,0 +1,38 @@
+"""In-memory search index tests"""
+import pytest
+
+from app.models import Product
+from app.services.search import InMemorySearchIndex
+
+
+@pytest.fixture
+def cable_products(db, products):
+    category_id = db.query(Product.category_id).filter(Product.id == products[0]).scalar()
+    cable = Product(
+        category_id=category_id, name="USB Cable", slug="usb-cable", description="Braided", base_price=9.0
+    )
+    charger = Product(
+        category_id=category_id, name="Charger", slug="charger", description="Ships with two cables", base_price=19.0
+    )
+    db.add_all([cable, charger])
+    db.commit()
+    yield cable.id, charger.id
+    db.delete(cable)
+    db.delete(charger)
+    db.commit()
+
+
+def test_description_matches_are_not_hidden_by_stronger_name_matches(db, cable_products):
+    cable_id, charger_id = cable_products
+    index = InMemorySearchIndex(refresh_seconds=0)
+
+    # Name matches rank first, but a description-only match is still a match
+    assert index.search(db, "cable", 0, 10) == [cable_id, charger_id]
+
+
+def test_every_query_token_must_match(db, cable_products):
+    cable_id, _ = cable_products
+    index = InMemorySearchIndex(refresh_seconds=0)
+
+    assert index.search(db, "usb braided", 0, 10) == [cable_id]
+    assert index.search(db, "usb charger", 0, 10) == []
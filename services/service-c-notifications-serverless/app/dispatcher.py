@@ -0,0 +1,100 @@
+"""
+Async dispatch pipeline for notification events
+Events are queued in memory and handled by a pool of workers; each worker
+runs the synchronous lambda-like handler on a thread so a slow provider
+never blocks the event loop. One semaphore caps handler concurrency at the
+worker count across queued events, direct dispatches and batches.
+"""
+import asyncio
+import os
+from typing import Dict, List, Optional
+
+from app.lambda_like import handle_event
+
+
+class EventDispatcher:
+    """Bounded asyncio queue drained by a fixed pool of workers"""
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.processed = 0
+        self.failed = 0
+
+    async def start(self):
+        """Start the worker pool"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._semaphore = asyncio.Semaphore(self.workers)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10.0):
+        """Drain queued events, then stop the workers"""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️  Stopping dispatcher with {self._queue.qsize()} event(s) still queued")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def dispatch(self, event: Dict) -> Dict:
+        """Handle one event (off the event loop) once a handler slot is free and return its result"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        async with self._semaphore:
+            result = await asyncio.to_thread(handle_event, event)
+        self.processed += 1
+        if not result.get("ok"):
+            self.failed += 1
+        return result
+
+    async def dispatch_many(self, events: List[Dict]) -> List[Dict]:
+        """Handle a batch concurrently, sharing the dispatcher-wide handler bound"""
+        return await asyncio.gather(*(self.dispatch(event) for event in events))
+
+    def free_slots(self) -> int:
+        if self._queue is None:
+            return 0
+        return self.queue_size - self._queue.qsize()
+
+    def enqueue(self, events: List[Dict]) -> bool:
+        """Queue a batch for background handling; all-or-nothing when full"""
+        if self._queue is None or self.free_slots() < len(events):
+            return False
+        for event in events:
+            self._queue.put_nowait(event)
+        return True
+
+    async def _worker(self):
+        while True:
+            event = await self._queue.get()
+            try:
+                await self.dispatch(event)
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ Error dispatching event: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "queue_size": self.queue_size,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+dispatcher = EventDispatcher(
+    workers=int(os.getenv("NOTIFY_WORKERS", "8")),
+    queue_size=int(os.getenv("NOTIFY_QUEUE_SIZE", "10000")),
+)
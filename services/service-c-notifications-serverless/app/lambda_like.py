@@ -2,108 +2,177 @@
 Lambda-like handler for notifications
 This function can be deployed to AWS Lambda in the future
 """
-from typing import Dict
+from collections import defaultdict
+from string import Template
+from typing import Callable, Dict, List, Optional
 from app.providers.console_logger import log_notification
 from app.providers.email_stub import send_email
 from app.providers.sms_stub import send_sms
+import json
 import os
 
+# Read once per container instead of once per event
+SMS_ENABLED = os.getenv("ENABLE_SMS", "false").lower() == "true"
+ADMIN_EMAIL = os.getenv("EMAIL_FROM", "admin@example.com")
+
+# event type -> handlers, filled by the @on decorator
+_HANDLERS: Dict[str, List[Callable[[Dict], None]]] = defaultdict(list)
+
+
+def on(*event_types: str):
+    """Register a handler for one or more event types (several handlers per type allowed)"""
+    def decorator(func: Callable[[Dict], None]) -> Callable[[Dict], None]:
+        for event_type in event_types:
+            _HANDLERS[event_type].append(func)
+        return func
+    return decorator
+
+
+# Templates are compiled once at import time
+TEMPLATES = {
+    "ORDER_PLACED": {
+        "subject": Template("Order Confirmation - $order_number"),
+        "body": Template("Thank you for your order! Your order #$order_number has been placed successfully."),
+    },
+    "ORDER_PAID": {
+        "subject": Template("Payment Confirmed - $order_number"),
+        "body": Template("Your payment for order #$order_number has been confirmed. We're preparing your items for shipment."),
+    },
+    "ORDER_SHIPPED": {
+        "log": Template("📦 Order $order_number shipped. Tracking: $tracking_number"),
+        "sms": Template("Your order $order_number has shipped! Track it: $tracking_number"),
+    },
+    "LOW_STOCK": {
+        "subject": Template("Low Stock Alert - $sku"),
+        "body": Template("SKU $sku is running low. Current quantity: $quantity"),
+    },
+}
+
+
+def render(event_type: str, part: str, data: Dict) -> str:
+    """Render a precompiled template with event data"""
+    return TEMPLATES[event_type][part].safe_substitute(
+        {key: "None" if value is None else value for key, value in data.items()}
+    )
+
 
 def handle_event(event: Dict) -> Dict:
     """
     Handle notification events
-    
+
     Args:
         event: Dict with structure:
             {
                 "type": "ORDER_PLACED" | "ORDER_PAID" | "ORDER_SHIPPED" | "LOW_STOCK" | ...,
                 "data": {...}
             }
-    
+
     Returns:
         Dict with {"ok": True} or {"ok": False, "error": "..."}
     """
     try:
         event_type = event.get("type")
         data = event.get("data", {})
-        
+
         # Always log to console
         log_notification(event_type, data)
-        
-        # Handle different event types
-        if event_type == "ORDER_PLACED":
-            handle_order_placed(data)
-        elif event_type == "ORDER_PAID":
-            handle_order_paid(data)
-        elif event_type == "ORDER_SHIPPED":
-            handle_order_shipped(data)
-        elif event_type == "LOW_STOCK":
-            handle_low_stock(data)
-        else:
+
+        handlers = _HANDLERS.get(event_type)
+        if not handlers:
             print(f"⚠️  Unknown event type: {event_type}")
-        
+        else:
+            for handler in handlers:
+                handler(data)
+
         return {"ok": True}
-    
+
     except Exception as e:
         print(f"❌ Error handling event: {e}")
         return {"ok": False, "error": str(e)}
 
 
+def handle_events(events: List[Dict]) -> List[Dict]:
+    """Handle a batch of events; one result per event, in order"""
+    return [handle_event(event) for event in events]
+
+
+def lambda_handler(event: Dict, context: Optional[object] = None) -> Dict:
+    """
+    AWS Lambda entrypoint
+
+    Accepts a single event, {"events": [...]}, or an SQS batch
+    ({"Records": [{"messageId": ..., "body": "<json event>"}, ...]}).
+    For SQS batches only failed messages are reported back, so the
+    rest of the batch is not redelivered.
+    """
+    if "Records" in event:
+        failures = []
+        for record in event["Records"]:
+            try:
+                result = handle_event(json.loads(record["body"]))
+            except (KeyError, TypeError, ValueError) as e:
+                result = {"ok": False, "error": str(e)}
+            if not result.get("ok"):
+                failures.append({"itemIdentifier": record.get("messageId")})
+        return {"batchItemFailures": failures}
+
+    if "events" in event:
+        results = handle_events(event["events"])
+        return {"ok": all(result.get("ok") for result in results), "results": results}
+
+    return handle_event(event)
+
+
+@on("ORDER_PLACED")
 def handle_order_placed(data: Dict):
     """Handle ORDER_PLACED event"""
-    order_id = data.get("order_id")
-    order_number = data.get("order_number")
     user_email = data.get("user_email")
-    
+
     if user_email:
         send_email(
             to=user_email,
-            subject=f"Order Confirmation - {order_number}",
-            body=f"Thank you for your order! Your order #{order_number} has been placed successfully."
+            subject=render("ORDER_PLACED", "subject", data),
+            body=render("ORDER_PLACED", "body", data)
         )
 
 
+@on("ORDER_PAID")
 def handle_order_paid(data: Dict):
     """Handle ORDER_PAID event"""
-    order_id = data.get("order_id")
-    order_number = data.get("order_number")
     user_email = data.get("user_email")
-    
+
     if user_email:
         send_email(
             to=user_email,
-            subject=f"Payment Confirmed - {order_number}",
-            body=f"Your payment for order #{order_number} has been confirmed. We're preparing your items for shipment."
+            subject=render("ORDER_PAID", "subject", data),
+            body=render("ORDER_PAID", "body", data)
         )
 
 
+@on("ORDER_SHIPPED")
 def handle_order_shipped(data: Dict):
     """Handle ORDER_SHIPPED event"""
-    order_id = data.get("order_id")
-    order_number = data.get("order_number")
-    tracking_number = data.get("tracking_number", "N/A")
-    
+    data = {"tracking_number": "N/A", **data}
+
     # In production, fetch user email from Service A
-    print(f"📦 Order {order_number} shipped. Tracking: {tracking_number}")
-    
+    print(render("ORDER_SHIPPED", "log", data))
+
     # Optionally send SMS if enabled
-    if os.getenv("ENABLE_SMS", "false").lower() == "true":
+    if SMS_ENABLED:
         phone = data.get("phone")
         if phone:
             send_sms(
                 to=phone,
-                message=f"Your order {order_number} has shipped! Track it: {tracking_number}"
+                message=render("ORDER_SHIPPED", "sms", data)
             )
 
 
+@on("LOW_STOCK")
 def handle_low_stock(data: Dict):
     """Handle LOW_STOCK event"""
-    sku = data.get("sku")
-    quantity = data.get("quantity")
-    
     # Send alert to admin
     send_email(
-        to=os.getenv("EMAIL_FROM", "admin@example.com"),
-        subject=f"Low Stock Alert - {sku}",
-        body=f"SKU {sku} is running low. Current quantity: {quantity}"
+        to=ADMIN_EMAIL,
+        subject=render("LOW_STOCK", "subject", data),
+        body=render("LOW_STOCK", "body", data)
     )
@@ -2,18 +2,32 @@
 Main FastAPI application for Service C - Notifications
 Wraps the lambda_like handler for local development
 """
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response, status
 from pydantic import BaseModel
-from typing import Dict
+from typing import Dict, List
+
+from app.dispatcher import dispatcher
+from app.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the dispatch workers and drain them on shutdown"""
+    await dispatcher.start()
+    yield
+    await dispatcher.stop()
 
-from app.lambda_like import handle_event
 
 app = FastAPI(
     title="Service C - Notifications",
     description="Serverless-style notification service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+app.add_middleware(MetricsMiddleware)
+
 
 class NotificationEvent(BaseModel):
     type: str
@@ -21,13 +35,38 @@ class NotificationEvent(BaseModel):
 
 
 @app.post("/notify")
-async def notify(event: NotificationEvent):
+async def notify(event: NotificationEvent, response: Response, wait: bool = True):
     """
     Notification endpoint
-    Calls the lambda-like handler
+    Calls the lambda-like handler off the event loop; with wait=false the
+    event is queued and 202 Accepted is returned immediately
+    """
+    if not wait:
+        if not dispatcher.enqueue([event.model_dump()]):
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Notification queue is full")
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"ok": True, "queued": 1}
+    
+    return await dispatcher.dispatch(event.model_dump())
+
+
+@app.post("/notify/batch")
+async def notify_batch(events: List[NotificationEvent], response: Response, wait: bool = False):
+    """
+    Batch notification endpoint
+    Queues all events for the worker pool and returns 202 Accepted; with
+    wait=true the events are handled concurrently and results returned
     """
-    result = handle_event(event.model_dump())
-    return result
+    payloads = [event.model_dump() for event in events]
+    
+    if wait:
+        results = await dispatcher.dispatch_many(payloads)
+        return {"ok": all(result.get("ok") for result in results), "results": results}
+    
+    if not dispatcher.enqueue(payloads):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Notification queue is full")
+    response.status_code = status.HTTP_202_ACCEPTED
+    return {"ok": True, "queued": len(payloads)}
 
 
 @app.get("/")
@@ -44,4 +83,10 @@ def root():
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {"status": "healthy", "dispatcher": dispatcher.stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
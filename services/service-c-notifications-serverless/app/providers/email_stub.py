@@ -1,4 +1,5 @@
 """Email provider stub (logs instead of sending)"""
+from app.providers.limits import provider_slot
 
 
 def send_email(to: str, subject: str, body: str):
@@ -6,8 +7,9 @@ def send_email(to: str, subject: str, body: str):
     Stub email sender - logs instead of actually sending
     In production, integrate with SendGrid, AWS SES, etc.
     """
-    print(f"\n📧 EMAIL (Stub)")
-    print(f"To: {to}")
-    print(f"Subject: {subject}")
-    print(f"Body: {body}")
-    print()
+    with provider_slot("email"):
+        print(f"\n📧 EMAIL (Stub)")
+        print(f"To: {to}")
+        print(f"Subject: {subject}")
+        print(f"Body: {body}")
+        print()
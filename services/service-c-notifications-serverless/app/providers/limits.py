@@ -0,0 +1,24 @@
+"""Per-provider concurrency caps
+
+Handlers run on worker threads, so a slow provider could otherwise occupy
+every worker. Each provider gets its own semaphore sized from the environment.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+_limits = {
+    "email": threading.BoundedSemaphore(int(os.getenv("EMAIL_CONCURRENCY", "4"))),
+    "sms": threading.BoundedSemaphore(int(os.getenv("SMS_CONCURRENCY", "2"))),
+}
+
+
+@contextmanager
+def provider_slot(provider: str):
+    """Hold one of the provider's concurrency slots for the duration of a send"""
+    semaphore = _limits.get(provider)
+    if semaphore is None:
+        yield
+        return
+    with semaphore:
+        yield
@@ -1,4 +1,5 @@
 """SMS provider stub (logs instead of sending)"""
+from app.providers.limits import provider_slot
 
 
 def send_sms(to: str, message: str):
@@ -6,7 +7,8 @@ def send_sms(to: str, message: str):
     Stub SMS sender - logs instead of actually sending
     In production, integrate with Twilio, AWS SNS, etc.
     """
-    print(f"\n📱 SMS (Stub)")
-    print(f"To: {to}")
-    print(f"Message: {message}")
-    print()
+    with provider_slot("sms"):
+        print(f"\n📱 SMS (Stub)")
+        print(f"To: {to}")
+        print(f"Message: {message}")
+        print()